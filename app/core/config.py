@@ -5,6 +5,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 DB_ENGINE = 'postgresql+psycopg2'
+ASYNC_DB_ENGINE = 'postgresql+asyncpg'
 POSTGRES_USER = getenv('POSTGRES_USER')
 POSTGRES_PASSWORD = getenv('POSTGRES_PASSWORD')
 POSTGRES_DB = getenv('POSTGRES_DB')
@@ -18,8 +19,66 @@ DATABASE_URL = (
     f"{POSTGRES_DB}"
 )
 
+DB_POOL_SIZE = int(getenv('DB_POOL_SIZE', 10))
+DB_MAX_OVERFLOW = int(getenv('DB_MAX_OVERFLOW', 20))
+DB_POOL_TIMEOUT = float(getenv('DB_POOL_TIMEOUT', 30))
+DB_POOL_RECYCLE = int(getenv('DB_POOL_RECYCLE', 1800))
+DB_POOL_PRE_PING = getenv('DB_POOL_PRE_PING', '1') == '1'
+DB_STATEMENT_CACHE_SIZE = int(getenv('DB_STATEMENT_CACHE_SIZE', 100))
+
+ASYNC_DATABASE_URL = (
+    f"{ASYNC_DB_ENGINE}://{POSTGRES_USER}:"
+    f"{POSTGRES_PASSWORD}@{POSTGRES_HOST}:"
+    f"{POSTGRES_PORT}/"
+    f"{POSTGRES_DB}"
+    f"?prepared_statement_cache_size={DB_STATEMENT_CACHE_SIZE}"
+)
+
 SECRET_KEY = getenv('SECRET_KEY')
 ALGORITHM = getenv('ALGORITHM')
 ACCESS_TOKEN_EXPIRE_MINUTES = int(getenv('ACCESS_TOKEN_EXPIRE_MINUTES'))
 REFRESH_TOKEN_EXPIRE_DAYS = int(getenv('REFRESH_TOKEN_EXPIRE_DAYS'))
 API_KEY = getenv('API_KEY')
+AUTH_CACHE_SIZE = int(getenv('AUTH_CACHE_SIZE', 10000))
+AUTH_CACHE_TTL = float(getenv('AUTH_CACHE_TTL', 60))
+PASSWORD_SCRYPT_N = int(getenv('PASSWORD_SCRYPT_N', 2 ** 14))
+PASSWORD_SCRYPT_R = int(getenv('PASSWORD_SCRYPT_R', 8))
+PASSWORD_SCRYPT_P = int(getenv('PASSWORD_SCRYPT_P', 1))
+PASSWORD_HASH_WORKERS = int(getenv('PASSWORD_HASH_WORKERS', 2))
+
+INFERENCE_MAX_BATCH_SIZE = int(getenv('INFERENCE_MAX_BATCH_SIZE', 32))
+INFERENCE_MAX_WAIT_MS = float(getenv('INFERENCE_MAX_WAIT_MS', 10))
+INFERENCE_WORKERS = int(getenv('INFERENCE_WORKERS', 2))
+INFERENCE_BACKEND = getenv('INFERENCE_BACKEND', 'torch')
+INFERENCE_ONNX_PATH = getenv('INFERENCE_ONNX_PATH', 'gestures_model.onnx')
+# Без набора изображений int8/torchscript/onnx не сверяются с float32: в логе предупреждение,
+# в /inference/metrics — verification: unverified
+INFERENCE_VALIDATION_DIR = getenv('INFERENCE_VALIDATION_DIR')
+INFERENCE_MIN_AGREEMENT = float(getenv('INFERENCE_MIN_AGREEMENT', 0.99))
+MODEL_LOADING = getenv('MODEL_LOADING', 'background')
+PREDICTION_CACHE_SIZE = int(getenv('PREDICTION_CACHE_SIZE', 4096))
+PREDICTION_CACHE_TTL = float(getenv('PREDICTION_CACHE_TTL', 24 * 60 * 60))
+PREDICTION_CACHE_PATH = getenv('PREDICTION_CACHE_PATH')
+PREDICTION_CACHE_DISK_SIZE = int(getenv('PREDICTION_CACHE_DISK_SIZE', 100000))
+# Ранний выход экономит кадры, но делает до group_size последовательных раундов инференса.
+# Оставлять выключенным, если важна задержка запроса или CPU не загружен; включать при
+# нехватке CPU, когда жесты обычно распознаются с первого кадра группы
+INFERENCE_EARLY_EXIT = getenv('INFERENCE_EARLY_EXIT', '0') == '1'
+# 0 — доступные ядра делятся поровну между воркерами
+INFERENCE_THREADS = int(getenv('INFERENCE_THREADS', 0))
+INFERENCE_INTEROP_THREADS = int(getenv('INFERENCE_INTEROP_THREADS', 1))
+INFERENCE_ADAPTIVE_THREADS = getenv('INFERENCE_ADAPTIVE_THREADS', '0') == '1'
+INFERENCE_IMAGES_PER_THREAD = int(getenv('INFERENCE_IMAGES_PER_THREAD', 2))
+INFERENCE_SERVER = getenv('INFERENCE_SERVER')
+INFERENCE_SERVER_TIMEOUT = float(getenv('INFERENCE_SERVER_TIMEOUT', 30))
+# Проба /ready ходит к серверу отдельным соединением с коротким таймаутом
+INFERENCE_READY_TIMEOUT = float(getenv('INFERENCE_READY_TIMEOUT', 1))
+INFERENCE_CLIENT_CONNECTIONS = int(getenv('INFERENCE_CLIENT_CONNECTIONS', 4))
+
+GESTURE_JOBS_DIR = getenv('GESTURE_JOBS_DIR', '/tmp/gesture_jobs')
+GESTURE_JOB_WORKERS = int(getenv('GESTURE_JOB_WORKERS', 1))
+GESTURE_JOB_POLL_INTERVAL = float(getenv('GESTURE_JOB_POLL_INTERVAL', 0.5))
+GESTURE_JOB_TIMEOUT = int(getenv('GESTURE_JOB_TIMEOUT', 300))
+VIDEO_MAX_FRAMES = int(getenv('VIDEO_MAX_FRAMES', 900))
+
+QUESTIONNAIRE_MAX_AGE = int(getenv('QUESTIONNAIRE_MAX_AGE', 60))
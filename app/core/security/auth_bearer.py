@@ -1,28 +1,20 @@
 from fastapi import Request, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from app.core.security.tokens import verify_token
 
 
-class JWTBearer(HTTPBearer):
-    def __init__(self, auto_error: bool = True, expected_token_type: str = "access"):
-        super().__init__(auto_error=auto_error)
-        self.expected_token_type = expected_token_type
+class BearerToken(HTTPBearer):
+    """Отдаёт сам bearer-токен без декодирования, проверка — в get_current_user."""
 
-    async def __call__(self, request: Request):
+    async def __call__(self, request: Request) -> str:
         credentials: HTTPAuthorizationCredentials = await super().__call__(request)
-        if credentials:
-            if credentials.scheme != "Bearer":
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Invalid authentication scheme."
-                )
-            try:
-                payload = verify_token(credentials.credentials)
-                return payload
-            except HTTPException as e:
-                raise e
-        else:
+        if not credentials:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Invalid authorization code."
-            )
\ No newline at end of file
+            )
+        if credentials.scheme != "Bearer":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Invalid authentication scheme."
+            )
+        return credentials.credentials
@@ -0,0 +1,74 @@
+"""Хэширование паролей scrypt в отдельном ограниченном пуле потоков.
+
+Хэш хранится строкой scrypt$n$r$p$salt$hash (base64). Всё, что не
+начинается с scrypt$, считается старым паролем в открытом виде.
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import secrets
+from typing import Optional, Tuple
+
+from app.core.config import PASSWORD_SCRYPT_N, PASSWORD_SCRYPT_R, PASSWORD_SCRYPT_P, PASSWORD_HASH_WORKERS
+from app.utils.inference_executor import lazy_executor
+
+PREFIX = "scrypt"
+SALT_SIZE = 16
+KEY_SIZE = 32
+
+_dummy_hash: Optional[str] = None
+
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * n * r * p + 2 ** 20, dklen=KEY_SIZE)
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+
+def hash_password(password: str) -> str:
+    salt = secrets.token_bytes(SALT_SIZE)
+    key = _scrypt(password, salt, PASSWORD_SCRYPT_N, PASSWORD_SCRYPT_R, PASSWORD_SCRYPT_P)
+    return f"{PREFIX}${PASSWORD_SCRYPT_N}${PASSWORD_SCRYPT_R}${PASSWORD_SCRYPT_P}${_b64(salt)}${_b64(key)}"
+
+
+def verify_password(password: str, stored: str) -> Tuple[bool, bool]:
+    """Возвращает (пароль верный, хэш нужно пересчитать с текущими параметрами)."""
+    if not stored.startswith(PREFIX + "$"):
+        return hmac.compare_digest(password.encode("utf-8"), stored.encode("utf-8")), True
+
+    try:
+        _, n, r, p, salt, key = stored.split("$")
+        n, r, p = int(n), int(r), int(p)
+        matches = hmac.compare_digest(_scrypt(password, base64.b64decode(salt), n, r, p), base64.b64decode(key))
+    except ValueError:
+        # Испорченный хэш (не те поля, битый base64, недопустимые n/r/p) — просто неверный пароль
+        return False, False
+    return matches, (n, r, p) != (PASSWORD_SCRYPT_N, PASSWORD_SCRYPT_R, PASSWORD_SCRYPT_P)
+
+
+def burn_verification(password: str):
+    # Для несуществующего пользователя тратим столько же времени, сколько на проверку
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = hash_password(secrets.token_hex(16))
+    verify_password(password, _dummy_hash)
+
+
+# Отдельный пул, чтобы всплеск логинов не занимал потоки инференса
+get_executor = lazy_executor(PASSWORD_HASH_WORKERS, "password")
+
+
+async def hash_password_async(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(get_executor(), hash_password, password)
+
+
+async def verify_password_async(password: str, stored: Optional[str]) -> Tuple[bool, bool]:
+    loop = asyncio.get_running_loop()
+    if stored is None:
+        await loop.run_in_executor(get_executor(), burn_verification, password)
+        return False, False
+    return await loop.run_in_executor(get_executor(), verify_password, password, stored)
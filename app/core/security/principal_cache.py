@@ -0,0 +1,77 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Set
+from uuid import UUID
+
+
+class Principal(NamedTuple):
+    id: UUID
+    username: str
+    name: str
+    role: str
+
+
+class PrincipalCache:
+    """LRU кэш аутентифицированных пользователей по токену.
+
+    Запись живёт не дольше ttl и не дольше exp самого токена; все записи
+    пользователя сбрасываются через invalidate_user.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._tokens: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[Principal]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(token)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                self._forget(token)
+            self.misses += 1
+            return None
+
+    def put(self, token: str, principal: Principal, token_expires_at: float):
+        if self.max_entries <= 0:
+            return
+        expires_at = min(token_expires_at, time.time() + self.ttl)
+        with self._lock:
+            if token in self._entries:
+                self._forget(token)
+            self._entries[token] = (principal, expires_at)
+            self._tokens.setdefault(principal.username, set()).add(token)
+            while len(self._entries) > self.max_entries:
+                self._forget(next(iter(self._entries)))
+
+    def invalidate_user(self, username: str):
+        with self._lock:
+            for token in list(self._tokens.get(username, ())):
+                self._forget(token)
+
+    def _forget(self, token: str):
+        principal, _ = self._entries.pop(token)
+        tokens = self._tokens.get(principal.username)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens[principal.username]
+
+    def metrics(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -1,17 +1,40 @@
 from fastapi import Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect, select
 
-from app.core.security.auth_bearer import JWTBearer
-from app.dependencies.database.database import get_db
+from app.core.config import AUTH_CACHE_SIZE, AUTH_CACHE_TTL
+from app.core.security.auth_bearer import BearerToken
+from app.core.security.principal_cache import Principal, PrincipalCache
+from app.core.security.tokens import verify_token
+from app.dependencies.database.database import AsyncSessionLocal
 from app.models.all_models import User
 
+principal_cache = PrincipalCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL)
 
-async def get_current_user(db: Session = Depends(get_db),
-                           token: str = Depends(JWTBearer(expected_token_type="access"))):
-    username: str = token.get("sub")
+
+async def get_current_user(token: str = Depends(BearerToken())) -> Principal:
+    # Повторный запрос с тем же токеном не декодирует JWT и не ходит в базу
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
+    payload = verify_token(token)
+    username: str = payload.get("sub")
     if username is None:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Could not validate credentials")
-    user = db.query(User).filter(User.username == username).first()
+    async with AsyncSessionLocal() as db:
+        user = (await db.execute(select(User).where(User.username == username))).scalars().first()
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+
+    principal = Principal(user.id, user.username, user.name, user.role)
+    principal_cache.put(token, principal, payload.get("exp", float("inf")))
+    return principal
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def invalidate_cached_user(mapper, connection, target: User):
+    # Кэш в каждом воркере свой: в других процессах запись доживёт максимум до AUTH_CACHE_TTL
+    history = inspect(target).attrs.username.history
+    for username in {target.username, *history.deleted}:
+        principal_cache.invalidate_user(username)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, ARRAY
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, ARRAY, Boolean, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -48,5 +48,31 @@ class TestResult(Base):
     gestures_result = Column(Integer, nullable=True)
     height = Column(Float, nullable=True)
     weight = Column(Float, nullable=True)
+    selected_answer_ids = Column(ARRAY(Integer), nullable=True)
 
     user = relationship("User", back_populates="test_results")
+
+    __table_args__ = (
+        Index('ix_test_results_user_id_created_at', 'user_id', 'created_at', 'id'),
+    )
+
+
+class GestureJob(Base):
+    __tablename__ = "gesture_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    test_result_id = Column(UUID(as_uuid=True), ForeignKey('test_results.id'), nullable=False)
+    test_number = Column(Integer, nullable=False)
+    strict = Column(Boolean, nullable=False)
+    group_size = Column(Integer, nullable=False)
+    gesture_names = Column(ARRAY(String), nullable=False)
+    image_count = Column(Integer, nullable=False)
+    status = Column(String, nullable=False)
+    result = Column(Integer, nullable=True)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index('ix_gesture_jobs_status_created_at', 'status', 'created_at'),
+    )
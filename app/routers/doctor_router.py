@@ -1,13 +1,22 @@
+import base64
+import binascii
+import csv
+import io
+import json
 from datetime import datetime
+from typing import Optional, Tuple, Literal
 from uuid import UUID
 
-from fastapi import Depends, HTTPException, APIRouter
+from fastapi import Depends, HTTPException, APIRouter, Query, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, UUID4
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_, select, tuple_, Select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.security.principal_cache import Principal
 from app.dependencies.current_user import get_current_user
-from app.dependencies.database.database import get_db
-from app.models.all_models import User, TestResult
+from app.dependencies.database.database import get_db, AsyncSessionLocal
+from app.models.all_models import TestResult
 
 router = APIRouter(tags=["Doctor"], prefix='/doctor')
 
@@ -19,29 +28,157 @@ class TestResultResponse(BaseModel):
     status: str
 
 
+DEFAULT_PAGE_SIZE = 50
+
+
+def encode_cursor(created_at: Optional[datetime], test_result_id: UUID) -> str:
+    raw = f"{created_at.isoformat() if created_at else ''}|{test_result_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, test_result_id = raw.split("|")
+        return datetime.fromisoformat(created_at) if created_at else None, UUID(test_result_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _after_cursor(cursor: str):
+    created_at, test_result_id = decode_cursor(cursor)
+    # При DESC строки с пустым created_at идут первыми, за ними — все остальные
+    if created_at is None:
+        return or_(and_(TestResult.created_at.is_(None), TestResult.id < test_result_id),
+                   TestResult.created_at.isnot(None))
+    return tuple_(TestResult.created_at, TestResult.id) < (created_at, test_result_id)
+
+
+def test_results_page_query(user_id: UUID, limit: Optional[int], cursor: Optional[str] = None,
+                            status: Optional[str] = None,
+                            created_from: Optional[datetime] = None, created_to: Optional[datetime] = None,
+                            patient_name: Optional[str] = None) -> Select:
+    # Выбираются только колонки ответа; порядок совпадает с индексом (user_id, created_at, id)
+    query = select(TestResult.id, TestResult.patient_name, TestResult.created_at, TestResult.status).where(
+        TestResult.user_id == user_id
+    ).order_by(TestResult.created_at.desc(), TestResult.id.desc())
+
+    if limit is not None:
+        query = query.limit(limit)
+    if cursor:
+        query = query.where(_after_cursor(cursor))
+    if status:
+        query = query.where(TestResult.status == status)
+    if created_from:
+        query = query.where(TestResult.created_at >= created_from)
+    if created_to:
+        query = query.where(TestResult.created_at < created_to)
+    if patient_name:
+        query = query.where(TestResult.patient_name.icontains(patient_name, autoescape=True))
+    return query
+
+
 @router.get("/test-results", response_model=list[TestResultResponse])
-def get_test_results_for_current_user(
-        current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+async def get_test_results_for_current_user(
+        response: Response,
+        limit: Optional[int] = Query(None, ge=1, le=200),
+        cursor: Optional[str] = None,
+        status: Optional[str] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        patient_name: Optional[str] = None,
+        current_user: Principal = Depends(get_current_user),
+        db: AsyncSession = Depends(get_db)
 ):
-    test_results = db.query(TestResult).filter(TestResult.user_id == current_user.id).all()
+    # Без limit и cursor отдаётся весь список, как раньше; постраничный режим включается любым из них
+    if limit is None and cursor:
+        limit = DEFAULT_PAGE_SIZE
+    query = test_results_page_query(current_user.id, limit, cursor, status, created_from, created_to, patient_name)
+    test_results = (await db.execute(query)).all()
 
-    if not test_results:
+    if not test_results and not cursor:
         raise HTTPException(status_code=404, detail="No test results found for the current user")
 
-    return test_results
+    # Курсор следующей страницы отдаётся в заголовке, тело остаётся прежним списком
+    if limit is not None and len(test_results) == limit:
+        last = test_results[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
+
+    return [row._asdict() for row in test_results]
+
+
+EXPORT_COLUMNS = [column for column in TestResult.__table__.columns if column.name != "user_id"]
+EXPORT_CHUNK_SIZE = 1000
+
+
+def _csv_value(value):
+    if isinstance(value, list):
+        return "; ".join(str(item) for item in value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _json_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+async def export_rows(query: Select, export_format: str):
+    # Своя сессия: сессия из get_db закрывается до того, как начнёт отдаваться тело ответа
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+        names = [column.name for column in EXPORT_COLUMNS]
+
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            buffer.write("\ufeff")
+            writer.writerow(names)
+            async for rows in result.partitions():
+                writer.writerows([_csv_value(value) for value in row] for row in rows)
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue().encode("utf-8")
+        else:
+            async for rows in result.partitions():
+                yield "".join(json.dumps(dict(zip(names, row)), ensure_ascii=False, default=_json_value) + "\n"
+                              for row in rows).encode("utf-8")
+
+
+@router.get("/test-results/export")
+async def export_test_results(
+        export_format: Literal["csv", "ndjson"] = Query("csv", alias="format"),
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        current_user: Principal = Depends(get_current_user),
+):
+    query = select(*EXPORT_COLUMNS).where(TestResult.user_id == current_user.id).order_by(
+        TestResult.created_at, TestResult.id)
+    if created_from:
+        query = query.where(TestResult.created_at >= created_from)
+    if created_to:
+        query = query.where(TestResult.created_at < created_to)
+
+    media_type = "text/csv; charset=utf-8" if export_format == "csv" else "application/x-ndjson"
+    filename = f"test-results-{datetime.utcnow():%Y%m%d}.{export_format}"
+    return StreamingResponse(export_rows(query, export_format), media_type=media_type,
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
 
 
 @router.get("/test-result/{test_result_id}")
-def get_test_result_by_uuid(
+async def get_test_result_by_uuid(
         test_result_id: UUID,
-        current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        current_user: Principal = Depends(get_current_user),
+        db: AsyncSession = Depends(get_db)
 ):
-    test_result = db.query(TestResult).filter(
+    test_result = (await db.execute(select(TestResult).where(
         TestResult.id == test_result_id,
         TestResult.user_id == current_user.id
-    ).first()
+    ))).scalars().first()
 
     if not test_result:
         raise HTTPException(status_code=404, detail="Test result not found")
@@ -62,8 +199,8 @@ class CreateTestAttemptInput(BaseModel):
 
 
 @router.post("/create_test_attempt/")
-async def create_test_attempt(input_data: CreateTestAttemptInput, db: Session = Depends(get_db),
-                              current_user: User = Depends(get_current_user)):
+async def create_test_attempt(input_data: CreateTestAttemptInput, db: AsyncSession = Depends(get_db),
+                              current_user: Principal = Depends(get_current_user)):
     new_test_result = TestResult(
         user_id=current_user.id,
         patient_name=input_data.patient_name,
@@ -73,7 +210,6 @@ async def create_test_attempt(input_data: CreateTestAttemptInput, db: Session =
     )
 
     db.add(new_test_result)
-    db.commit()
-    db.refresh(new_test_result)
+    await db.commit()
 
     return {"test_id": new_test_result.id}
@@ -1,14 +1,23 @@
+import asyncio
+import time
 from typing import List
-from uuid import UUID
+from uuid import UUID, uuid4
 
 from fastapi import APIRouter, Form, UploadFile, File, Depends, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import INFERENCE_EARLY_EXIT
 from app.dependencies.database.database import get_db
-from app.models.all_models import TestResult
-from app.utils.ai_integration import correct_count
+from app.models.all_models import TestResult, GestureJob
+from app.utils.ai_integration import (batcher, classify_uploads, correct_count_batched, correct_count_early_exit,
+                                      correct_count_video, count_matches, prediction_cache, scoring_metrics,
+                                      backend_metrics)
+from app.utils.gesture_jobs import enqueue_job
+from app.utils.gesture_results import GESTURE_TEST_COLUMNS, save_gesture_result, save_gesture_results
+from app.utils.video_frames import SAMPLING_MODES, av
 
 router = APIRouter(tags=['Gestures'])
 
@@ -22,6 +31,18 @@ class GesturesResult(BaseModel):
     gestures: List[GestureResponse]
 
 
+class GestureTestInput(BaseModel):
+    test_number: int
+    gesture_names: List[str]
+    image_count: int = Field(ge=0)
+    # У тестов свои параметры подсчёта: на фронтенде group_size 3 для тестов 1–3 и 5 для теста 4
+    strict: bool
+    group_size: int = Field(ge=1)
+
+
+gesture_tests_adapter = TypeAdapter(List[GestureTestInput])
+
+
 @router.post("/classify-gestures/{uuid}")
 async def recognize_gestures(
         uuid: UUID,
@@ -30,42 +51,151 @@ async def recognize_gestures(
         test_number: int = Form(...),
         gesture_names: str = Form(...),
         images: List[UploadFile] = File(...),
-        db: Session = Depends(get_db)):
+        db: AsyncSession = Depends(get_db)):
     gesture_names_list = gesture_names.split(',')
     strict_bool = strict == 1
 
-    result = correct_count(gesture_names_list, images, strict=strict_bool, group_size=group_size)
+    if INFERENCE_EARLY_EXIT:
+        result, skipped = await correct_count_early_exit(gesture_names_list, images, strict=strict_bool,
+                                                         group_size=group_size)
+    else:
+        result = await correct_count_batched(gesture_names_list, images, strict=strict_bool, group_size=group_size)
+        skipped = 0
 
     try:
-        # Поиск записи в базе данных по UUID
-        test_result = db.query(TestResult).filter(TestResult.id == uuid).first()
-        if not test_result:
-            raise HTTPException(status_code=404, detail="Test result not found")
-
-        if test_number == 1:
-            test_result.first_test = result
+        await save_gesture_result(db, uuid, test_number, result)
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
-        if test_number == 2:
-            test_result.second_test = result
+    return {"result": result, "test_number": test_number, "skipped_images": skipped}
 
-        if test_number == 3:
-            test_result.third_test = result
 
-        # Если это четвертый тест, суммируем все результаты
-        if test_number == 4:
-            test_result.fourth_test = result
-            total_result = sum([
-                test_result.first_test or 0,
-                test_result.second_test or 0,
-                test_result.third_test or 0,
-                result
-            ])
-            test_result.gestures_result = total_result
+@router.post("/classify-gestures/{uuid}/video")
+async def recognize_gestures_video(
+        uuid: UUID,
+        strict: int = Form(...),
+        group_size: int = Form(...),
+        test_number: int = Form(...),
+        gesture_names: str = Form(...),
+        sampling: str = Form("uniform"),
+        video: UploadFile = File(...),
+        db: AsyncSession = Depends(get_db)):
+    if av is None:
+        raise HTTPException(status_code=501, detail="Video decoding is not available")
+    if sampling not in SAMPLING_MODES:
+        raise HTTPException(status_code=400, detail=f"Sampling must be one of: {', '.join(SAMPLING_MODES)}")
 
-        db.commit()
+    try:
+        result = await correct_count_video(gesture_names.split(','), video, strict=strict == 1,
+                                           group_size=group_size, sampling=sampling)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Could not process video: {e}")
 
+    try:
+        await save_gesture_result(db, uuid, test_number, result)
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
     return {"result": result, "test_number": test_number}
+
+
+@router.post("/classify-gestures/{uuid}/all")
+async def recognize_all_gestures(
+        uuid: UUID,
+        tests: str = Form(...),
+        images: List[UploadFile] = File(...),
+        db: AsyncSession = Depends(get_db)):
+    # tests — JSON-список [{"test_number", "gesture_names", "image_count", "strict", "group_size"}],
+    # кадры идут подряд в том же порядке
+    try:
+        gesture_tests = gesture_tests_adapter.validate_json(tests)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+
+    test_numbers = [test.test_number for test in gesture_tests]
+    if len(set(test_numbers)) != len(test_numbers) or not set(test_numbers) <= set(GESTURE_TEST_COLUMNS):
+        raise HTTPException(status_code=400, detail="Test numbers must be unique and between 1 and 4")
+    if sum(test.image_count for test in gesture_tests) != len(images):
+        raise HTTPException(status_code=400, detail="Image counts do not match the number of uploaded images")
+
+    # Кадры всех тестов идут в модель одним батчем
+    defined_gestures = await classify_uploads(images)
+
+    results = {}
+    offset = 0
+    for test in gesture_tests:
+        frames = defined_gestures[offset:offset + test.image_count]
+        results[test.test_number] = count_matches(test.gesture_names, frames, strict=test.strict,
+                                                  group_size=test.group_size)
+        offset += test.image_count
+
+    try:
+        gestures_result = await save_gesture_results(db, uuid, results)
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+    return {"results": results, "gestures_result": gestures_result}
+
+
+@router.post("/classify-gestures/{uuid}/jobs", status_code=202)
+async def submit_gestures_job(
+        uuid: UUID,
+        strict: int = Form(...),
+        group_size: int = Form(...),
+        test_number: int = Form(...),
+        gesture_names: str = Form(...),
+        images: List[UploadFile] = File(...),
+        db: AsyncSession = Depends(get_db)):
+    test_result = (await db.execute(select(TestResult).where(TestResult.id == uuid))).scalars().first()
+    if not test_result:
+        raise HTTPException(status_code=404, detail="Test result not found")
+
+    job = GestureJob(
+        id=uuid4(),
+        test_result_id=uuid,
+        test_number=test_number,
+        strict=strict == 1,
+        group_size=group_size,
+        gesture_names=gesture_names.split(','),
+        image_count=len(images),
+    )
+    try:
+        await enqueue_job(db, job, [image.file for image in images])
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+    return {"job_id": job.id, "status": job.status}
+
+
+@router.get("/gesture-jobs/{job_id}")
+async def get_gestures_job(job_id: UUID, wait: float = 0, db: AsyncSession = Depends(get_db)):
+    # wait > 0 — ожидание результата до указанного числа секунд (не больше 30)
+    deadline = time.monotonic() + min(max(wait, 0), 30)
+    while True:
+        query = select(GestureJob).where(GestureJob.id == job_id).execution_options(populate_existing=True)
+        job = (await db.execute(query)).scalars().first()
+        if not job:
+            raise HTTPException(status_code=404, detail="Gesture job not found")
+        if job.status in ("COMPLETE", "FAILED") or time.monotonic() >= deadline:
+            break
+        # Новая транзакция, чтобы увидеть изменения воркера
+        await db.rollback()
+        await asyncio.sleep(0.5)
+
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "test_number": job.test_number,
+        "result": job.result,
+        "error": job.error,
+    }
+
+
+@router.get("/inference/metrics")
+async def inference_metrics():
+    return {"batcher": batcher.metrics(), "cache": prediction_cache.metrics(), "scoring": scoring_metrics(),
+            "backend": backend_metrics()}
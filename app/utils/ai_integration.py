@@ -1,42 +1,193 @@
-import io
-from typing import List
-import torch
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, NamedTuple, Any, BinaryIO, Sequence, Tuple
+
+import numpy as np
 from PIL import Image as PILImage
 from fastapi import UploadFile
-from transformers import ViTForImageClassification, ViTImageProcessor
+
+from app.core.config import (INFERENCE_BACKEND, INFERENCE_ONNX_PATH, INFERENCE_VALIDATION_DIR,
+                             INFERENCE_MIN_AGREEMENT, INFERENCE_MAX_BATCH_SIZE, PREDICTION_CACHE_SIZE,
+                             PREDICTION_CACHE_TTL, PREDICTION_CACHE_PATH, PREDICTION_CACHE_DISK_SIZE,
+                             INFERENCE_SERVER)
+from app.utils.inference_batcher import MicroBatcher
+from app.utils.inference_client import InferenceClient
+from app.utils import thread_budget
+from app.utils.inference_executor import run_blocking
+from app.utils.prediction_cache import PredictionCache, file_key
+from app.utils.video_frames import sample_frames
 
 model_path = "custom_hand_gestures_model_v2_28june"
-model = ViTForImageClassification.from_pretrained(model_path)
-processor = ViTImageProcessor.from_pretrained(model_path)
-id2label = model.config.id2label
 
+logger = logging.getLogger(__name__)
+
+
+class LoadedModel(NamedTuple):
+    model: Any
+    processor: Any
+    id2label: dict
+    backend: Any
+    normalizer: Any
+
+
+_loaded: Optional[LoadedModel] = None
+_load_lock = threading.Lock()
+
+# Какой бэкенд реально обслуживает запросы и проверен ли он против float32
+backend_status = {"requested": INFERENCE_BACKEND, "active": None, "verification": None, "agreement": None}
+
+
+def onnx_path() -> str:
+    # Граф привязан к версии файлов модели, после обновления модели он экспортируется заново
+    path = Path(INFERENCE_ONNX_PATH)
+    return str(path.with_name(f"{path.stem}-{model_files_version()[:12]}{path.suffix}"))
+
+
+def _load_backend(model, processor):
+    from app.utils.inference_backends import build_backend, verify_backend
+
+    selected = build_backend(INFERENCE_BACKEND, model, onnx_path())
+    backend_status["active"] = INFERENCE_BACKEND
+    if INFERENCE_BACKEND == "torch":
+        backend_status["verification"] = "not_required"
+        return selected
+    if not INFERENCE_VALIDATION_DIR:
+        logger.warning("Backend %s is not verified against float32: INFERENCE_VALIDATION_DIR is not set",
+                       INFERENCE_BACKEND)
+        backend_status["verification"] = "unverified"
+        return selected
+
+    agreement = verify_backend(selected, model, processor, INFERENCE_VALIDATION_DIR)
+    backend_status["agreement"] = agreement
+    if agreement < INFERENCE_MIN_AGREEMENT:
+        logger.warning("Backend %s agrees with float32 on %.3f of validation images, falling back to torch",
+                       INFERENCE_BACKEND, agreement)
+        backend_status.update(active="torch", verification="failed")
+        return build_backend("torch", model, onnx_path())
+    backend_status["verification"] = "verified"
+    return selected
+
+
+def load_model() -> LoadedModel:
+    global _loaded
+    # torch и transformers импортируются только здесь, чтобы импорт приложения оставался быстрым
+    if _loaded is None:
+        with _load_lock:
+            if _loaded is None:
+                from transformers import ViTForImageClassification, ViTImageProcessor
+                from app.utils.preprocessing import Normalizer
+
+                thread_budget.on_model_load()
+                model = ViTForImageClassification.from_pretrained(model_path)
+                processor = ViTImageProcessor.from_pretrained(model_path)
+                backend = _load_backend(model, processor)
+                # Бэкенды int8/torchscript/onnx держат свои веса; ссылка на float32-модель только мешала
+                # освободить её память. Если был откат на torch, модель остаётся жива через сам бэкенд
+                _loaded = LoadedModel(model if INFERENCE_BACKEND == "torch" else None, processor,
+                                      model.config.id2label, backend, Normalizer.from_processor(processor))
+    return _loaded
+
+
+async def is_model_ready() -> bool:
+    if INFERENCE_SERVER:
+        return await run_blocking(batcher.is_ready)
+    return _loaded is not None
+
+
+def warm_up():
+    # С внешним сервером инференса модель в этом процессе не загружается вовсе
+    if INFERENCE_SERVER:
+        batcher.info()
+        return
+    load_model()
+    width, height = input_size()
+    predict_batch(np.zeros((1, height, width, 3), dtype=np.uint8))
+
+
+def model_version() -> str:
+    if INFERENCE_SERVER:
+        return batcher.info()["version"]
+    return model_files_version()
+
+
+def model_files_version() -> str:
+    # Версия определяется по файлам модели и бэкенду, без загрузки torch
+    digest = hashlib.sha1(INFERENCE_BACKEND.encode())
+    for path in sorted(Path(model_path).iterdir()):
+        stat = path.stat()
+        digest.update(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+prediction_cache = PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL, PREDICTION_CACHE_PATH,
+                                   PREDICTION_CACHE_DISK_SIZE)
+
+
+@lru_cache(maxsize=None)
+def _preprocessor_config() -> dict:
+    with open(Path(model_path) / "preprocessor_config.json", "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def input_size() -> Tuple[int, int]:
+    size = _preprocessor_config().get("size", 224)
+    if isinstance(size, dict):
+        return size["width"], size["height"]
+    return size, size
+
+
+def read_cached(files: List[BinaryIO]) -> Tuple[List[str], List[Optional[str]]]:
+    # Версия внешнего сервера может смениться после его перезапуска, локальная — только вместе с процессом
+    if prediction_cache.version is None or INFERENCE_SERVER:
+        prediction_cache.set_version(model_version())
+
+    keys = [file_key(file) for file in files]
+    return keys, prediction_cache.get_many(keys)
 
-def load_images(image_files: List[UploadFile]) -> List[PILImage.Image]:
-    images = []
-    for image_file in image_files:
-        image_bytes = image_file.file.read()
-        image = PILImage.open(io.BytesIO(image_bytes)).convert("RGB")
-        images.append(image)
-    return images
 
+def decode_into(file: BinaryIO, out: np.ndarray):
+    width, height = input_size()
+    resample = _preprocessor_config().get("resample", PILImage.BILINEAR)
 
-def predict_batch(images: List[PILImage.Image]) -> List[str]:
-    inputs = processor(images=images, return_tensors="pt")
-    with torch.no_grad():
-        outputs = model(**inputs)
+    file.seek(0)
+    with PILImage.open(file) as image:
+        # Для JPEG декодер сразу уменьшает изображение, не выходя ниже входа модели
+        image.draft("RGB", (width, height))
+        out[...] = np.asarray(image.convert("RGB").resize((width, height), resample))
+
+
+def decode_files(files: List[BinaryIO]) -> np.ndarray:
+    width, height = input_size()
+    batch = np.empty((len(files), height, width, 3), dtype=np.uint8)
+    for i, file in enumerate(files):
+        decode_into(file, batch[i])
+    return batch
+
+
+def predict_batch(images: Sequence[np.ndarray]) -> List[str]:
+    model, processor, id2label, backend, normalizer = load_model()
+    batch = images if isinstance(images, np.ndarray) else np.stack(images)
+    thread_budget.adapt(len(batch))
+    logits = backend(normalizer(batch))
 
-    logits = outputs.logits
     predicted_class_indices = logits.argmax(-1)
     predicted_labels = [id2label[idx.item()] for idx in predicted_class_indices]
 
     return predicted_labels
 
 
-def correct_count(gesture_names_list: List[str], images: List[UploadFile], strict: bool = True,
-                  group_size: int = 3) -> int:
-    loaded_images = load_images(images)
-    defined_gestures = predict_batch(loaded_images)
+batcher = InferenceClient(INFERENCE_SERVER) if INFERENCE_SERVER else MicroBatcher(predict_batch)
 
+
+def count_matches(gesture_names_list: List[str], defined_gestures: List[str], strict: bool = True,
+                  group_size: int = 3) -> int:
     count = 0
 
     for i in range(0, len(gesture_names_list), group_size):
@@ -51,3 +202,115 @@ def correct_count(gesture_names_list: List[str], images: List[UploadFile], stric
                 count += 1
 
     return count
+
+
+async def classify_files(files: List[BinaryIO]) -> List[str]:
+    # В пуле выполняется только чтение и декодирование; результата батчера ждёт цикл событий,
+    # чтобы поток пула не простаивал всё время инференса
+    keys, labels = await run_blocking(read_cached, files)
+
+    # Декодирование и инференс только для изображений, которых нет в кэше
+    missing = [i for i, label in enumerate(labels) if label is None]
+    if missing:
+        loaded_images = await run_blocking(decode_files, [files[i] for i in missing])
+        predicted = await asyncio.wrap_future(batcher.submit(loaded_images))
+        for i, label in zip(missing, predicted):
+            labels[i] = label
+        await run_blocking(prediction_cache.put_many, {keys[i]: labels[i] for i in missing})
+
+    return labels
+
+
+async def classify_uploads(image_files: List[UploadFile]) -> List[str]:
+    return await classify_files([image_file.file for image_file in image_files])
+
+
+scoring_stats = {mode: {"requests": 0, "rounds": 0, "forward_passes": 0, "classified_images": 0,
+                        "skipped_images": 0, "latency": 0.0}
+                 for mode in ("batched", "early_exit")}
+
+
+def _record_scoring(mode: str, started: float, rounds: List[int], total: int):
+    stats = scoring_stats[mode]
+    classified = sum(rounds)
+    stats["requests"] += 1
+    stats["rounds"] += len(rounds)
+    # Верхняя оценка: кадры из кэша в модель не попадают
+    stats["forward_passes"] += sum(math.ceil(size / INFERENCE_MAX_BATCH_SIZE) for size in rounds)
+    stats["classified_images"] += classified
+    stats["skipped_images"] += total - classified
+    stats["latency"] += time.perf_counter() - started
+
+
+def backend_metrics() -> Optional[dict]:
+    # С внешним сервером модель загружена в его процессе, состояние бэкенда приходит в его info
+    if INFERENCE_SERVER:
+        return batcher.metrics()["backend"]
+    return backend_status
+
+
+def scoring_metrics() -> dict:
+    metrics = {}
+    for mode, stats in scoring_stats.items():
+        requests = stats["requests"] or 1
+        metrics[mode] = {
+            "requests": stats["requests"],
+            "classified_images": stats["classified_images"],
+            "skipped_images": stats["skipped_images"],
+            "avg_rounds": stats["rounds"] / requests,
+            "avg_forward_passes": stats["forward_passes"] / requests,
+            "avg_latency_ms": stats["latency"] / requests * 1000,
+        }
+    return metrics
+
+
+async def correct_count_batched(gesture_names_list: List[str], images: List[UploadFile], strict: bool = True,
+                                group_size: int = 3) -> int:
+    started = time.perf_counter()
+    defined_gestures = await classify_uploads(images)
+    _record_scoring("batched", started, [len(images)], len(images))
+    return count_matches(gesture_names_list, defined_gestures, strict=strict, group_size=group_size)
+
+
+async def correct_count_video(gesture_names_list: List[str], video: UploadFile, strict: bool = True,
+                              group_size: int = 3, sampling: str = "uniform") -> int:
+    # Из ролика берётся столько же кадров, сколько было бы фото, и сразу в размере входа модели
+    frames = await run_blocking(sample_frames, video.file, len(gesture_names_list), group_size, input_size(),
+                                sampling)
+    defined_gestures = await asyncio.wrap_future(batcher.submit(frames))
+    return count_matches(gesture_names_list, defined_gestures, strict=strict, group_size=group_size)
+
+
+async def correct_count_early_exit(gesture_names_list: List[str], images: List[UploadFile], strict: bool = True,
+                                   group_size: int = 3) -> Tuple[int, int]:
+    """Кадры классифицируются по одному из каждой нерешённой группы за раунд;
+    группа, в которой жест уже найден, больше не отправляется в модель.
+
+    Раундов до group_size, и они идут последовательно: каждый — отдельное
+    ожидание батчера и forward pass. Пропущенные кадры экономят CPU, но
+    задержка запроса обычно выше, чем у одного батча на все кадры, а при
+    плохом распознавании (жест находится поздно) растёт и число forward
+    pass. Сравнение режимов — в scoring_metrics() (/inference/metrics).
+    """
+    started = time.perf_counter()
+    undecided = {start: gesture_names_list[start] for start in range(0, len(gesture_names_list), group_size)}
+    count = 0
+    rounds = []
+
+    for offset in range(group_size):
+        indices = [start + offset for start in undecided if start + offset < len(images)]
+        if not indices:
+            break
+
+        labels = await classify_uploads([images[i] for i in indices])
+        rounds.append(len(indices))
+        for index, label in zip(indices, labels):
+            start = index - offset
+            if label == undecided[start]:
+                count += 1
+                del undecided[start]
+
+    skipped = len(images) - sum(rounds)
+    _record_scoring("early_exit", started, rounds, len(images))
+    logger.info("Early-exit scoring skipped %d of %d images in %d rounds", skipped, len(images), len(rounds))
+    return count, skipped
@@ -1,44 +1,123 @@
 import json
-from typing import Dict, Set, List, Any
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Optional, Sequence
 
+import numpy as np
 from fastapi import HTTPException
 
+ANSWERS_PATH = Path(__file__).parent / "data" / "mockanswers.json"
 
-def load_answers():
-    with open("app/utils/data/mockanswers.json", "r", encoding="utf-8") as file:
-        return json.load(file)["answers"]
+TEXT_FIELDS = ('complaints', 'recommendation_for_user', 'recommendation_for_doctor', 'am', 'av', 'sp')
+POINT_FIELDS = ('nfr_points', 'kfr_points', 'symptoms_points')
 
 
-def process_selected_answers(selected_answers: List[Dict[str, Any]]) -> Dict[str, Any]:
-    if not selected_answers:
-        raise HTTPException(status_code=404, detail="No answers found for the provided IDs.")
+def _gather(indptr: np.ndarray, indices: np.ndarray, ids: np.ndarray):
+    """Строки CSR для ids: (номер id в ids, значение) для всех их элементов."""
+    starts = indptr[ids]
+    lengths = indptr[ids + 1] - starts
+    owners = np.repeat(np.arange(len(ids)), lengths)
+    positions = np.arange(lengths.sum()) + np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    return owners, indices[positions]
 
-    unique_fields: Dict[str, Set[str]] = {
-        'complaints': set(),
-        'recommendation_for_user': set(),
-        'recommendation_for_doctor': set(),
-        'am': set(),
-        'av': set(),
-        'sp': set()
-    }
 
-    total_points = {
-        'nfr_points': 0,
-        'kfr_points': 0,
-        'symptoms_points': 0
-    }
+class AnswerCatalog:
+    """Неизменяемый справочник ответов в колоночном виде.
 
-    for answer in selected_answers:
-        for field in unique_fields:
-            if answer.get(field):
-                unique_fields[field].add(answer[field])
+    Баллы хранятся матрицей answer_id x поле, текстовые значения интернированы
+    (id значений каждого поля идут подряд, поля — в порядке TEXT_FIELDS), а id
+    значений ответов лежат в CSR-виде: indptr по answer_id и indices, так что
+    память линейна по числу ответов.
+    """
 
-        for point_type in total_points:
-            total_points[point_type] += answer.get(point_type, 0)
+    def __init__(self, answers: List[Dict[str, Any]], mtime: float = 0.0):
+        self.mtime = mtime
+        size = max((answer['answer_id'] for answer in answers), default=-1) + 1
 
-    result = {
-        **{field: list(values) for field, values in unique_fields.items()},
-        **total_points
-    }
+        self.valid = np.zeros(size, dtype=bool)
+        self.points = np.zeros((size, len(POINT_FIELDS)), dtype=np.int64)
+        for answer in answers:
+            self.valid[answer['answer_id']] = True
+            self.points[answer['answer_id']] = [answer.get(field) or 0 for field in POINT_FIELDS]
 
-    return result
+        self.values: List[str] = []
+        self.field_starts = np.zeros(len(TEXT_FIELDS), dtype=np.int64)
+        owners, value_ids = [], []
+        for f, field in enumerate(TEXT_FIELDS):
+            self.field_starts[f] = len(self.values)
+            interned: Dict[str, int] = {}
+            for answer in answers:
+                if answer.get(field):
+                    owners.append(answer['answer_id'])
+                    value_ids.append(interned.setdefault(answer[field], len(self.values) + len(interned)))
+            self.values.extend(interned)
+
+        owners = np.array(owners, dtype=np.int64)
+        order = np.argsort(owners, kind="stable")
+        self.indptr = np.concatenate(([0], np.cumsum(np.bincount(owners, minlength=size))))
+        self.indices = np.array(value_ids, dtype=np.int64)[order]
+
+    @classmethod
+    def from_file(cls, path: Path = ANSWERS_PATH) -> "AnswerCatalog":
+        mtime = os.stat(path).st_mtime
+        with open(path, "r", encoding="utf-8") as file:
+            return cls(json.load(file)["answers"], mtime)
+
+    def _select(self, answer_ids: Iterable[int]) -> np.ndarray:
+        ids = np.unique(np.fromiter(answer_ids, dtype=np.int64))
+        ids = ids[(ids >= 0) & (ids < len(self.valid))]
+        return ids[self.valid[ids]]
+
+    def score_many(self, submissions: Sequence[Iterable[int]]) -> List[Optional[Dict[str, Any]]]:
+        """Результаты для пачки наборов answer_id; None для набора без известных ответов."""
+        selected = [self._select(answer_ids) for answer_ids in submissions]
+        scored = [i for i, ids in enumerate(selected) if len(ids)]
+        results: List[Optional[Dict[str, Any]]] = [None] * len(selected)
+        if not scored:
+            return results
+
+        lengths = [len(selected[i]) for i in scored]
+        flat = np.concatenate([selected[i] for i in scored])
+        offsets = np.cumsum([0] + lengths[:-1])
+        submission_of = np.repeat(np.arange(len(scored)), lengths)
+
+        totals = np.add.reduceat(self.points[flat], offsets, axis=0).tolist()
+
+        # Уникальные пары (набор, значение) в порядке набора, затем поля, затем интернирования
+        width = max(len(self.values), 1)
+        owners, value_ids = _gather(self.indptr, self.indices, flat)
+        keys = np.sort(submission_of[owners] * width + value_ids)
+        keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+        rows, value_ids = np.divmod(keys, width)
+        groups = rows * len(TEXT_FIELDS) + np.searchsorted(self.field_starts, value_ids, side="right") - 1
+        bounds = np.searchsorted(groups, np.arange(len(scored) * len(TEXT_FIELDS) + 1)).tolist()
+        values = [self.values[j] for j in value_ids.tolist()]
+
+        for row, i in enumerate(scored):
+            base = row * len(TEXT_FIELDS)
+            result = {field: values[bounds[base + f]:bounds[base + f + 1]] for f, field in enumerate(TEXT_FIELDS)}
+            result.update(zip(POINT_FIELDS, totals[row]))
+            results[i] = result
+        return results
+
+    def score(self, answer_ids: Iterable[int]) -> Dict[str, Any]:
+        result = self.score_many([answer_ids])[0]
+        if result is None:
+            raise HTTPException(status_code=404, detail="No answers found for the provided IDs.")
+        return result
+
+
+_catalog: Optional[AnswerCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_answer_catalog() -> AnswerCatalog:
+    global _catalog
+    # Справочник перечитывается, только если файл изменился
+    mtime = os.stat(ANSWERS_PATH).st_mtime
+    if _catalog is None or _catalog.mtime != mtime:
+        with _catalog_lock:
+            if _catalog is None or _catalog.mtime != mtime:
+                _catalog = AnswerCatalog.from_file(ANSWERS_PATH)
+    return _catalog
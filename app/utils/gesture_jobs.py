@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import shutil
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import BinaryIO, List
+from uuid import UUID
+
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import GESTURE_JOBS_DIR, GESTURE_JOB_WORKERS, GESTURE_JOB_POLL_INTERVAL, GESTURE_JOB_TIMEOUT
+from app.dependencies.database.database import AsyncSessionLocal
+from app.models.all_models import GestureJob
+from app.utils.ai_integration import classify_files, count_matches
+from app.utils.inference_executor import run_blocking
+from app.utils.gesture_results import save_gesture_result
+
+logger = logging.getLogger(__name__)
+
+_wake_up = asyncio.Event()
+_workers: List[asyncio.Task] = []
+
+
+def job_dir(job_id: UUID) -> Path:
+    return Path(GESTURE_JOBS_DIR) / str(job_id)
+
+
+def store_images(job_id: UUID, files: List[BinaryIO]):
+    directory = job_dir(job_id)
+    directory.mkdir(parents=True, exist_ok=True)
+    for i, file in enumerate(files):
+        file.seek(0)
+        with open(directory / f"{i}.img", "wb") as target:
+            shutil.copyfileobj(file, target)
+
+
+def open_stored(job_id: UUID, image_count: int) -> List[BinaryIO]:
+    paths = [job_dir(job_id) / f"{i}.img" for i in range(image_count)]
+    missing = sum(not path.exists() for path in paths)
+    if missing:
+        # Задача в базе пережила перезапуск, а файлы нет: GESTURE_JOBS_DIR должен быть постоянным томом
+        raise FileNotFoundError(f"{missing} of {image_count} stored images are missing, "
+                                f"the job cannot be classified")
+    return [open(path, "rb") for path in paths]
+
+
+async def enqueue_job(db: AsyncSession, job: GestureJob, files: List[BinaryIO]) -> GestureJob:
+    # Изображения сохраняются до коммита, чтобы воркер никогда не увидел задачу без файлов
+    await run_blocking(store_images, job.id, files)
+    job.status = "QUEUED"
+    db.add(job)
+    await db.commit()
+    _wake_up.set()
+    return job
+
+
+async def claim_job(db: AsyncSession):
+    stale = datetime.utcnow() - timedelta(seconds=GESTURE_JOB_TIMEOUT)
+    query = select(GestureJob).where(
+        or_(GestureJob.status == "QUEUED",
+            (GestureJob.status == "RUNNING") & (GestureJob.updated_at < stale))
+    ).order_by(GestureJob.created_at).limit(1).with_for_update(skip_locked=True)
+    job = (await db.execute(query)).scalars().first()
+
+    if job:
+        job.status = "RUNNING"
+        await db.commit()
+    return job
+
+
+async def run_job(db: AsyncSession, job: GestureJob):
+    files = await run_blocking(open_stored, job.id, job.image_count)
+    try:
+        defined_gestures = await classify_files(files)
+    finally:
+        for file in files:
+            file.close()
+    result = count_matches(job.gesture_names, defined_gestures, strict=job.strict, group_size=job.group_size)
+    await save_gesture_result(db, job.test_result_id, job.test_number, result)
+
+    job.result = result
+    job.status = "COMPLETE"
+    await db.commit()
+    shutil.rmtree(job_dir(job.id), ignore_errors=True)
+
+
+async def _wait_for_jobs():
+    try:
+        await asyncio.wait_for(_wake_up.wait(), GESTURE_JOB_POLL_INTERVAL)
+    except asyncio.TimeoutError:
+        pass
+    _wake_up.clear()
+
+
+async def _work():
+    while True:
+        async with AsyncSessionLocal() as db:
+            try:
+                job = await claim_job(db)
+                if job is None:
+                    await _wait_for_jobs()
+                    continue
+                job_id = job.id
+                try:
+                    await run_job(db, job)
+                except Exception as e:
+                    logger.exception("Gesture job %s failed", job_id)
+                    await db.rollback()
+                    job.status = "FAILED"
+                    job.error = str(e)
+                    await db.commit()
+                    shutil.rmtree(job_dir(job_id), ignore_errors=True)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Gesture job worker error")
+                await db.rollback()
+                await _wait_for_jobs()
+
+
+def start_job_workers():
+    while len(_workers) < GESTURE_JOB_WORKERS:
+        _workers.append(asyncio.create_task(_work(), name=f"gesture-job-{len(_workers)}"))
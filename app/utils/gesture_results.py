@@ -0,0 +1,53 @@
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import case, func, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.all_models import TestResult
+
+GESTURE_TEST_COLUMNS = {
+    1: TestResult.first_test,
+    2: TestResult.second_test,
+    3: TestResult.third_test,
+    4: TestResult.fourth_test,
+}
+
+
+def gesture_result_update(uuid, results: Dict[int, int]):
+    # В SET видны старые значения строки, поэтому записываемые столбцы подставляются значениями
+    tests = [literal(results[number]) if number in results else column
+             for number, column in GESTURE_TEST_COLUMNS.items()]
+    coalesced = [func.coalesce(value, 0) for value in tests]
+    total = sum(coalesced[1:], coalesced[0])
+
+    # Итог считается, как только есть четвёртый тест, и пересчитывается при любой
+    # более поздней записи, в каком бы порядке ни пришли тесты
+    return update(TestResult).where(TestResult.id == uuid).values({
+        **{GESTURE_TEST_COLUMNS[number]: result for number, result in results.items()},
+        TestResult.gestures_result: case((tests[-1].isnot(None), total), else_=TestResult.gestures_result),
+    }).returning(TestResult.gestures_result).execution_options(synchronize_session=False)
+
+
+async def save_gesture_result(db: AsyncSession, uuid, test_number: int, result: int) -> Optional[int]:
+    if test_number not in GESTURE_TEST_COLUMNS:
+        found = (await db.execute(select(TestResult.id).where(TestResult.id == uuid))).first()
+    else:
+        # Один UPDATE ... RETURNING: строка блокируется на время записи, и итог
+        # считается в базе по актуальным значениям, а не по прочитанным ранее
+        found = (await db.execute(gesture_result_update(uuid, {test_number: result}))).first()
+    if not found:
+        raise HTTPException(status_code=404, detail="Test result not found")
+
+    await db.commit()
+    return found[0] if test_number in GESTURE_TEST_COLUMNS else None
+
+
+async def save_gesture_results(db: AsyncSession, uuid, results: Dict[int, int]) -> Optional[int]:
+    """Все переданные подтесты и итог пишутся одним UPDATE в одной транзакции."""
+    found = (await db.execute(gesture_result_update(uuid, results))).first()
+    if not found:
+        raise HTTPException(status_code=404, detail="Test result not found")
+
+    await db.commit()
+    return found[0]
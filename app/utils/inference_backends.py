@@ -0,0 +1,111 @@
+import os
+from pathlib import Path
+from typing import Callable, List
+
+import torch
+from PIL import Image as PILImage
+
+from app.utils import thread_budget
+
+BACKENDS = ("torch", "int8", "torchscript", "onnx")
+
+Backend = Callable[[torch.Tensor], torch.Tensor]
+
+
+class _LogitsModule(torch.nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, pixel_values):
+        return self.model(pixel_values=pixel_values).logits
+
+
+def _example_input(model) -> torch.Tensor:
+    size = model.config.image_size
+    return torch.zeros(1, model.config.num_channels, size, size)
+
+
+def _torch_backend(model) -> Backend:
+    def run(pixel_values):
+        with torch.inference_mode():
+            return model(pixel_values=pixel_values).logits
+    return run
+
+
+def _int8_backend(model) -> Backend:
+    quantized = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return _torch_backend(quantized)
+
+
+def _torchscript_backend(model) -> Backend:
+    with torch.inference_mode():
+        traced = torch.jit.trace(_LogitsModule(model).eval(), _example_input(model), strict=False)
+    traced = torch.jit.optimize_for_inference(torch.jit.freeze(traced))
+
+    def run(pixel_values):
+        with torch.inference_mode():
+            return traced(pixel_values)
+    return run
+
+
+def _onnx_backend(model, onnx_path: str) -> Backend:
+    try:
+        import onnxruntime
+    except ImportError:
+        raise RuntimeError("onnxruntime is required for the onnx inference backend")
+
+    if not os.path.exists(onnx_path):
+        # Экспорт во временный файл и переименование: параллельно стартующие воркеры не увидят недописанный граф
+        exported = f"{onnx_path}.{os.getpid()}.tmp"
+        torch.onnx.export(
+            _LogitsModule(model).eval(),
+            _example_input(model),
+            exported,
+            input_names=["pixel_values"],
+            output_names=["logits"],
+            dynamic_axes={"pixel_values": {0: "batch"}, "logits": {0: "batch"}},
+            opset_version=17,
+        )
+        os.replace(exported, onnx_path)
+
+    options = onnxruntime.SessionOptions()
+    budget = thread_budget.current()
+    if budget is not None:
+        options.intra_op_num_threads = budget.intra_op
+        options.inter_op_num_threads = budget.inter_op
+    session = onnxruntime.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+
+    def run(pixel_values):
+        (logits,) = session.run(["logits"], {"pixel_values": pixel_values.numpy()})
+        return torch.from_numpy(logits)
+    return run
+
+
+def build_backend(name: str, model, onnx_path: str) -> Backend:
+    if name == "torch":
+        return _torch_backend(model)
+    if name == "int8":
+        return _int8_backend(model)
+    if name == "torchscript":
+        return _torchscript_backend(model)
+    if name == "onnx":
+        return _onnx_backend(model, onnx_path)
+    raise ValueError(f"Unknown inference backend: {name}")
+
+
+def load_validation_images(image_dir: str) -> List[PILImage.Image]:
+    paths = sorted(p for p in Path(image_dir).iterdir() if p.suffix.lower() in (".png", ".jpg", ".jpeg"))
+    return [PILImage.open(p).convert("RGB") for p in paths]
+
+
+def _labels(backend: Backend, pixel_values: torch.Tensor) -> List[int]:
+    return backend(pixel_values).argmax(-1).tolist()
+
+
+def verify_backend(backend: Backend, model, processor, image_dir: str) -> float:
+    images = load_validation_images(image_dir)
+    pixel_values = processor(images=images, return_tensors="pt")["pixel_values"]
+    reference = _labels(_torch_backend(model), pixel_values)
+    labels = _labels(backend, pixel_values)
+    return sum(a == b for a, b in zip(labels, reference)) / len(reference)
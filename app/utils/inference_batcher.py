@@ -0,0 +1,128 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Tuple, Any
+
+from app.core.config import INFERENCE_MAX_BATCH_SIZE, INFERENCE_MAX_WAIT_MS
+
+
+def _combine(parts: List[Future]) -> Future:
+    combined = Future()
+    remaining = [len(parts)]
+    lock = threading.Lock()
+
+    def done(part: Future):
+        with lock:
+            if combined.done():
+                return
+            if part.exception() is not None:
+                combined.set_exception(part.exception())
+                return
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                combined.set_result([label for future in parts for label in future.result()])
+
+    for part in parts:
+        part.add_done_callback(done)
+    return combined
+
+
+class MicroBatcher:
+    """Собирает изображения из параллельных запросов в один forward pass модели."""
+
+    def __init__(self, predict: Callable[[List[Any]], List[str]], max_batch_size: int = INFERENCE_MAX_BATCH_SIZE,
+                 max_wait_ms: float = INFERENCE_MAX_WAIT_MS):
+        self.predict = predict
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue[Tuple[List[Any], Future]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._carry = None
+
+        self.batches = 0
+        self.images = 0
+        self.requests = 0
+
+    def submit(self, images: List[Any]) -> Future:
+        future = Future()
+        if len(images) == 0:
+            future.set_result([])
+            return future
+        # Слишком большой запрос режется на части, чтобы max_batch_size ограничивал и его
+        if len(images) > self.max_batch_size:
+            return _combine([self.submit(images[i:i + self.max_batch_size])
+                             for i in range(0, len(images), self.max_batch_size)])
+        self._ensure_started()
+        self._queue.put((images, future))
+        return future
+
+    def _ensure_started(self):
+        # Поток создаётся лениво и заново после fork воркера gunicorn
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+                self._thread.start()
+
+    def _collect(self) -> List[Tuple[List[Any], Future]]:
+        if self._carry is not None:
+            pending, self._carry = [self._carry], None
+        else:
+            pending = [self._queue.get()]
+        size = len(pending[0][0])
+        deadline = time.monotonic() + self.max_wait
+
+        while size < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            # Запрос, который не помещается в текущий батч, уходит в следующий
+            if size + len(item[0]) > self.max_batch_size:
+                self._carry = item
+                break
+            pending.append(item)
+            size += len(item[0])
+
+        return pending
+
+    def _run(self):
+        while True:
+            pending = self._collect()
+            batch = [image for images, _ in pending for image in images]
+
+            try:
+                labels = self.predict(batch)
+            except Exception as e:
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.images += len(batch)
+            self.requests += len(pending)
+
+            offset = 0
+            for images, future in pending:
+                future.set_result(labels[offset:offset + len(images)])
+                offset += len(images)
+
+    def metrics(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize() + (self._carry is not None),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "requests": self.requests,
+            "images": self.images,
+            "avg_batch_size": self.images / self.batches if self.batches else 0.0,
+            "avg_batch_fill": self.images / (self.batches * self.max_batch_size) if self.batches else 0.0,
+        }
@@ -0,0 +1,186 @@
+import json
+import os
+import socket
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, List, Optional
+
+import numpy as np
+
+from app.core.config import INFERENCE_SERVER_TIMEOUT, INFERENCE_READY_TIMEOUT, INFERENCE_CLIENT_CONNECTIONS
+from app.utils.inference_protocol import (MAGIC, VERSION, KIND_INFO, KIND_CLASSIFY, STATUS_OK, RESPONSE,
+                                          parse_address, request_header)
+
+
+class InferenceServerError(RuntimeError):
+    pass
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytearray:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        chunk = sock.recv_into(view[received:])
+        if chunk == 0:
+            raise ConnectionResetError("Inference server closed the connection")
+        received += chunk
+    return buffer
+
+
+class InferenceClient:
+    """Клиент сервера инференса с тем же интерфейсом, что у MicroBatcher.
+
+    Каждый поток пула держит своё постоянное соединение; батчи из разных
+    воркеров собирает уже сервер. На каждом новом соединении метки и версия
+    модели перечитываются: после переподключения это может быть уже
+    перезапущенный сервер с другой моделью.
+    """
+
+    def __init__(self, address: str, timeout: float = INFERENCE_SERVER_TIMEOUT,
+                 connections: int = INFERENCE_CLIENT_CONNECTIONS, ready_timeout: float = INFERENCE_READY_TIMEOUT):
+        self.address = address
+        self.family, self.target = parse_address(address)
+        self.timeout = timeout
+        self.ready_timeout = ready_timeout
+        self.connections = connections
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._local = threading.local()
+        self._info = None
+
+        self.requests = 0
+        self.images = 0
+        self.errors = 0
+        self.reconnects = 0
+        self.total_latency = 0.0
+
+    def _ensure_started(self) -> ThreadPoolExecutor:
+        # Пул и соединения создаются лениво и заново после fork воркера gunicorn
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.connections,
+                                                    thread_name_prefix="inference-client")
+                self._local = threading.local()
+                self._pid = os.getpid()
+            return self._executor
+
+    def _connect(self, timeout: Optional[float] = None) -> socket.socket:
+        sock = socket.socket(self.family, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout if timeout is None else timeout)
+        try:
+            sock.connect(self.target)
+        except OSError:
+            sock.close()
+            raise
+        if self.family != socket.AF_UNIX:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def _open(self) -> socket.socket:
+        sock = self._local.sock = self._connect()
+        self._info = json.loads(self._exchange(sock, request_header(KIND_INFO), None))
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def _exchange(self, sock: socket.socket, header: bytes, payload: Optional[memoryview]) -> bytes:
+        sock.sendall(header)
+        if payload is not None:
+            sock.sendall(payload)
+        magic, version, status, length = RESPONSE.unpack(_recv_exactly(sock, RESPONSE.size))
+        if magic != MAGIC or version != VERSION:
+            raise InferenceServerError("Unexpected response from inference server")
+        body = bytes(_recv_exactly(sock, length))
+        if status != STATUS_OK:
+            raise InferenceServerError(body.decode("utf-8", errors="replace"))
+        return body
+
+    def _request(self, header: bytes, payload: Optional[memoryview] = None) -> bytes:
+        sock = getattr(self._local, "sock", None)
+        reused = sock is not None
+        try:
+            if sock is None:
+                sock = self._open()
+            return self._exchange(sock, header, payload)
+        except InferenceServerError:
+            raise
+        except socket.timeout:
+            # Ответ может прийти позже и сбить следующий запрос, поэтому соединение выбрасывается
+            self._close()
+            raise
+        except ConnectionError:
+            self._close()
+            if not reused:
+                raise
+        # Сервер закрыл простаивавшее соединение (например, перезапустился) — одна повторная попытка
+        self.reconnects += 1
+        try:
+            sock = self._open()
+            return self._exchange(sock, header, payload)
+        except (InferenceServerError, OSError):
+            self._close()
+            raise
+
+    def _load_info(self) -> dict:
+        if self._info is None:
+            self._info = json.loads(self._request(request_header(KIND_INFO)))
+        return self._info
+
+    def info(self) -> dict:
+        if self._info is None:
+            return self._ensure_started().submit(self._load_info).result()
+        return self._info
+
+    def is_ready(self) -> bool:
+        # Отдельное короткое соединение мимо пула: его потоки могут быть заняты долгой классификацией
+        try:
+            sock = self._connect(self.ready_timeout)
+            try:
+                self._info = json.loads(self._exchange(sock, request_header(KIND_INFO), None))
+            finally:
+                sock.close()
+            return True
+        except (OSError, InferenceServerError, ValueError):
+            return False
+
+    def _classify(self, images: np.ndarray) -> List[str]:
+        started = time.perf_counter()
+        try:
+            count, height, width, channels = images.shape
+            body = self._request(request_header(KIND_CLASSIFY, count, height, width, channels),
+                                 memoryview(images).cast("B"))
+        except Exception:
+            self.errors += 1
+            raise
+        self.requests += 1
+        self.images += count
+        self.total_latency += time.perf_counter() - started
+        # Метки берутся после запроса: при переподключении они могли обновиться
+        labels = self._info["labels"]
+        return [labels[i] for i in np.frombuffer(body, dtype="<u2").tolist()]
+
+    def submit(self, images: Any) -> Future:
+        if len(images) == 0:
+            future = Future()
+            future.set_result([])
+            return future
+        batch = np.ascontiguousarray(images if isinstance(images, np.ndarray) else np.stack(images), dtype=np.uint8)
+        return self._ensure_started().submit(self._classify, batch)
+
+    def metrics(self) -> dict:
+        return {
+            "server": self.address,
+            "requests": self.requests,
+            "images": self.images,
+            "errors": self.errors,
+            "reconnects": self.reconnects,
+            "avg_latency_ms": self.total_latency / self.requests * 1000 if self.requests else 0.0,
+            "backend": self._info.get("backend") if self._info else None,
+        }
@@ -0,0 +1,35 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, TypeVar
+
+from app.core.config import INFERENCE_WORKERS
+
+T = TypeVar("T")
+
+
+def lazy_executor(max_workers: int, thread_name_prefix: str) -> Callable[[], ThreadPoolExecutor]:
+    """Функция, отдающая пул потоков процесса: он создаётся при первом вызове и заново после fork."""
+    lock = threading.Lock()
+    executor, pid = None, None
+
+    def get_executor() -> ThreadPoolExecutor:
+        nonlocal executor, pid
+        # Потоки не переживают fork воркера gunicorn
+        with lock:
+            if executor is None or pid != os.getpid():
+                executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+                pid = os.getpid()
+            return executor
+
+    return get_executor
+
+
+get_executor = lazy_executor(INFERENCE_WORKERS, "inference")
+
+
+async def run_blocking(func: Callable[..., T], *args, **kwargs) -> T:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), partial(func, *args, **kwargs))
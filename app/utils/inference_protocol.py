@@ -0,0 +1,41 @@
+"""Двоичный протокол между веб-воркерами и отдельным сервером инференса.
+
+Запрос: заголовок REQUEST (magic, версия, тип, число кадров, высота, ширина,
+каналы), для CLASSIFY за ним кадры uint8 в формате (N, H, W, C) подряд.
+Ответ: заголовок RESPONSE (magic, версия, статус, длина тела) и тело:
+для CLASSIFY — N индексов меток uint16, для INFO — JSON, для ошибки — текст.
+Все числа little-endian, соединение переиспользуется для следующих запросов.
+"""
+import socket
+import struct
+from typing import Tuple, Union
+
+MAGIC = b"GINF"
+VERSION = 1
+
+KIND_INFO = 1
+KIND_CLASSIFY = 2
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+REQUEST = struct.Struct("<4sBBIHHB")
+RESPONSE = struct.Struct("<4sBBI")
+
+MAX_PAYLOAD = 256 * 2 ** 20
+
+
+def parse_address(address: str) -> Tuple[int, Union[str, Tuple[str, int]]]:
+    """"unix:/path/to.sock" или "host:port" -> (семейство сокета, адрес)."""
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[len("unix:"):]
+    host, _, port = address.rpartition(":")
+    return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+
+def request_header(kind: int, count: int = 0, height: int = 0, width: int = 0, channels: int = 0) -> bytes:
+    return REQUEST.pack(MAGIC, VERSION, kind, count, height, width, channels)
+
+
+def response_header(status: int, length: int) -> bytes:
+    return RESPONSE.pack(MAGIC, VERSION, status, length)
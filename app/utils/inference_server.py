@@ -0,0 +1,144 @@
+"""Отдельный процесс инференса жестов, общий для всех воркеров gunicorn.
+
+Процесс владеет моделью и микробатчером, веб-воркеры ходят к нему через
+InferenceClient (INFERENCE_SERVER в .env) и сами torch не импортируют.
+
+    python -m app.utils.inference_server --address unix:/tmp/gestures-inference.sock
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+import socket
+
+import numpy as np
+
+from app.core.config import INFERENCE_SERVER
+from app.utils import ai_integration, thread_budget
+from app.utils.inference_batcher import MicroBatcher
+from app.utils.inference_protocol import (MAGIC, VERSION, KIND_INFO, KIND_CLASSIFY, STATUS_OK, STATUS_ERROR,
+                                          REQUEST, MAX_PAYLOAD, parse_address, response_header)
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceServer:
+    def __init__(self):
+        loaded = ai_integration.load_model()
+        self.labels = [loaded.id2label[i] for i in range(len(loaded.id2label))]
+        self.label_index = {label: i for i, label in enumerate(self.labels)}
+        self.input_size = ai_integration.input_size()
+        self.info = json.dumps({
+            "version": ai_integration.model_files_version(),
+            "labels": self.labels,
+            "input_size": self.input_size,
+            "backend": ai_integration.backend_status,
+            "pid": os.getpid(),
+        }).encode("utf-8")
+        # Свой батчер: в этом процессе ai_integration.batcher может оказаться клиентом к самому себе
+        self.batcher = MicroBatcher(ai_integration.predict_batch)
+        width, height = self.input_size
+        self.batcher.submit(np.zeros((1, height, width, 3), dtype=np.uint8)).result()
+        self.connections = {}
+
+    async def _reply(self, writer: asyncio.StreamWriter, status: int, payload: bytes):
+        writer.write(response_header(status, len(payload)))
+        writer.write(payload)
+        await writer.drain()
+
+    async def _classify(self, frames: np.ndarray) -> bytes:
+        labels = await asyncio.wrap_future(self.batcher.submit(frames))
+        return np.array([self.label_index[label] for label in labels], dtype="<u2").tobytes()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections[asyncio.current_task()] = writer
+        try:
+            while True:
+                try:
+                    header = await reader.readexactly(REQUEST.size)
+                except asyncio.IncompleteReadError:
+                    break
+                magic, version, kind, count, height, width, channels = REQUEST.unpack(header)
+                if magic != MAGIC or version != VERSION:
+                    await self._reply(writer, STATUS_ERROR, b"Unsupported protocol")
+                    break
+
+                if kind == KIND_INFO:
+                    await self._reply(writer, STATUS_OK, self.info)
+                    continue
+                if kind != KIND_CLASSIFY:
+                    await self._reply(writer, STATUS_ERROR, b"Unknown request kind")
+                    break
+
+                size = count * height * width * channels
+                if size > MAX_PAYLOAD:
+                    # Тело не читаем, поэтому соединение дальше не синхронизировать — закрываем
+                    await self._reply(writer, STATUS_ERROR, b"Request is too large")
+                    break
+                data = await reader.readexactly(size)
+                if (width, height) != tuple(self.input_size) or channels != 3:
+                    await self._reply(writer, STATUS_ERROR, b"Frames do not match the model input size")
+                    continue
+
+                frames = np.frombuffer(data, dtype=np.uint8).reshape(count, height, width, channels)
+                try:
+                    await self._reply(writer, STATUS_OK, await self._classify(frames))
+                except Exception as e:
+                    logger.exception("Inference request failed")
+                    await self._reply(writer, STATUS_ERROR, str(e).encode("utf-8"))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections.pop(asyncio.current_task(), None)
+            writer.close()
+
+    async def close_connections(self):
+        # Закрытие транспорта даёт обработчикам EOF, и они завершаются сами, без отмены посреди запроса
+        for writer in self.connections.values():
+            writer.close()
+        await asyncio.gather(*self.connections, return_exceptions=True)
+
+
+async def serve(address: str):
+    server = InferenceServer()
+
+    family, target = parse_address(address)
+    if family == socket.AF_UNIX:
+        if os.path.exists(target):
+            os.unlink(target)
+        listener = await asyncio.start_unix_server(server.handle, path=target)
+        os.chmod(target, 0o660)
+    else:
+        listener = await asyncio.start_server(server.handle, host=target[0], port=target[1])
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+
+    logger.info("Inference server listening on %s", address)
+    async with listener:
+        await stop.wait()
+        listener.close()
+        await server.close_connections()
+    if family == socket.AF_UNIX and os.path.exists(target):
+        os.unlink(target)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Standalone gesture inference server")
+    parser.add_argument("--address", default=INFERENCE_SERVER or "unix:/tmp/gestures-inference.sock")
+    parser.add_argument("--model-path", default=ai_integration.model_path)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    ai_integration.model_path = args.model_path
+    # Модель одна на все веб-воркеры, поэтому ей достаются все ядра
+    thread_budget.configure(1)
+    asyncio.run(serve(args.address))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import BinaryIO, Dict, List, Optional
+
+
+def file_key(file: BinaryIO, chunk_size: int = 64 * 1024) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    file.seek(0)
+    for chunk in iter(lambda: file.read(chunk_size), b""):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PredictionCache:
+    """LRU/TTL кэш меток жестов по хэшу загруженного файла с общим дисковым уровнем (sqlite).
+
+    Дисковый уровень тоже ограничен: не чаще раза в prune_interval секунд
+    запись удаляет просроченные строки и самые давно прочитанные сверх
+    disk_max_entries.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, disk_path: Optional[str] = None,
+                 disk_max_entries: int = 100000, prune_interval: float = 60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_path = disk_path
+        self.disk_max_entries = disk_max_entries
+        self.prune_interval = prune_interval
+        self._pruned_at = 0.0
+        self.version = None
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def set_version(self, version: str):
+        # Метки, посчитанные другой версией модели, больше не действительны
+        with self._lock:
+            if version == self.version:
+                return
+            self.version = version
+            self._entries.clear()
+            if self.disk_path:
+                with self._disk() as connection:
+                    connection.execute("DELETE FROM predictions WHERE version != ?", (version,))
+
+    def _disk(self) -> sqlite3.Connection:
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(self.disk_path, timeout=5, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS predictions "
+                "(key TEXT PRIMARY KEY, version TEXT NOT NULL, label TEXT NOT NULL, created_at REAL NOT NULL, "
+                "accessed_at REAL NOT NULL DEFAULT 0)"
+            )
+            columns = {row[1] for row in self._connection.execute("PRAGMA table_info(predictions)")}
+            if "accessed_at" not in columns:
+                # Файл кэша от прежней версии без времени последнего чтения
+                self._connection.execute("ALTER TABLE predictions ADD COLUMN accessed_at REAL NOT NULL DEFAULT 0")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS ix_predictions_accessed_at "
+                                     "ON predictions (accessed_at)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS ix_predictions_created_at "
+                                     "ON predictions (created_at)")
+            self._connection.commit()
+            self._pid = os.getpid()
+        return self._connection
+
+    def get_many(self, keys: List[str]) -> List[Optional[str]]:
+        now = time.time()
+        labels: List[Optional[str]] = [None] * len(keys)
+        missing = []
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] > now:
+                    self._entries.move_to_end(key)
+                    labels[i] = entry[0]
+                    self.hits += 1
+                else:
+                    missing.append(i)
+
+            if missing and self.disk_path:
+                placeholders = ",".join("?" * len(missing))
+                rows = self._disk().execute(
+                    f"SELECT key, label, created_at FROM predictions "
+                    f"WHERE version = ? AND key IN ({placeholders})",
+                    (self.version, *(keys[i] for i in missing)),
+                ).fetchall()
+                found = {key: (label, created_at) for key, label, created_at in rows if created_at + self.ttl > now}
+                if found:
+                    with self._disk() as connection:
+                        connection.execute(
+                            f"UPDATE predictions SET accessed_at = ? WHERE key IN ({','.join('?' * len(found))})",
+                            (now, *found),
+                        )
+                still_missing = []
+                for i in missing:
+                    if keys[i] in found:
+                        label, created_at = found[keys[i]]
+                        labels[i] = label
+                        self._remember(keys[i], label, created_at + self.ttl)
+                        self.disk_hits += 1
+                    else:
+                        still_missing.append(i)
+                missing = still_missing
+
+            self.misses += len(missing)
+        return labels
+
+    def put_many(self, items: Dict[str, str]):
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            for key, label in items.items():
+                self._remember(key, label, now + self.ttl)
+            if self.disk_path:
+                with self._disk() as connection:
+                    connection.executemany(
+                        "INSERT OR REPLACE INTO predictions (key, version, label, created_at, accessed_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        [(key, self.version, label, now, now) for key, label in items.items()],
+                    )
+                    if now - self._pruned_at >= self.prune_interval:
+                        self._prune(connection, now)
+
+    def _prune(self, connection: sqlite3.Connection, now: float):
+        connection.execute("DELETE FROM predictions WHERE created_at <= ?", (now - self.ttl,))
+        connection.execute(
+            "DELETE FROM predictions WHERE key IN "
+            "(SELECT key FROM predictions ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.disk_max_entries,),
+        )
+        self._pruned_at = now
+
+    def _remember(self, key: str, label: str, expires_at: float):
+        self._entries[key] = (label, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def metrics(self) -> dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "version": self.version,
+        }
@@ -0,0 +1,37 @@
+from typing import Sequence
+
+import numpy as np
+import torch
+
+
+class Normalizer:
+    """Rescale и normalize ViTImageProcessor одним проходом по uint8 буферу (N, H, W, C)."""
+
+    def __init__(self, image_mean: Sequence[float], image_std: Sequence[float], rescale_factor: float = 1 / 255,
+                 do_rescale: bool = True, do_normalize: bool = True):
+        # Таблица значений для каждого канала считается в тех же типах, что и в процессоре,
+        # поэтому на одном и том же uint8 буфере результат совпадает с ним бит в бит
+        values = np.arange(256, dtype=np.float64)
+        if do_rescale:
+            values = values * rescale_factor
+        values = values.astype(np.float32)
+
+        channels = len(image_mean)
+        table = np.repeat(values[None, :], channels, axis=0)
+        if do_normalize:
+            mean = np.array(image_mean, dtype=np.float32)[:, None]
+            std = np.array(image_std, dtype=np.float32)[:, None]
+            table = (table - mean) / std
+        self.table = np.ascontiguousarray(table, dtype=np.float32)
+
+    @classmethod
+    def from_processor(cls, processor) -> "Normalizer":
+        return cls(processor.image_mean, processor.image_std, processor.rescale_factor,
+                   processor.do_rescale, processor.do_normalize)
+
+    def __call__(self, batch: np.ndarray) -> torch.Tensor:
+        count, height, width, channels = batch.shape
+        pixel_values = np.empty((count, channels, height, width), dtype=np.float32)
+        for channel in range(channels):
+            np.take(self.table[channel], batch[..., channel], out=pixel_values[:, channel], mode="clip")
+        return torch.from_numpy(pixel_values)
@@ -0,0 +1,95 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from fastapi.responses import Response
+
+from app.core.config import QUESTIONNAIRE_MAX_AGE
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+QUESTIONNAIRE_PATH = Path(__file__).resolve().parents[2] / "mocktest.json"
+
+
+def _accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    encodings = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            encodings[name.strip().lower()] = quality
+    return encodings
+
+
+class QuestionnairePayload:
+    """Анкета, заранее сериализованная и сжатая для отдачи как есть."""
+
+    def __init__(self, data, mtime: float = 0.0):
+        self.mtime = mtime
+        body = json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()[:32]
+
+        # Для каждого варианта кодирования свой строгий ETag
+        self.variants = {"identity": (body, f'"{digest}"')}
+        self.variants["gzip"] = (gzip.compress(body, compresslevel=9, mtime=0), f'"{digest}-gzip"')
+        if brotli is not None:
+            self.variants["br"] = (brotli.compress(body, quality=11), f'"{digest}-br"')
+        self.etags = {etag for _, etag in self.variants.values()}
+
+    @classmethod
+    def from_file(cls, path: Path = QUESTIONNAIRE_PATH) -> "QuestionnairePayload":
+        mtime = os.stat(path).st_mtime
+        with open(path, "r", encoding="utf-8") as file:
+            return cls(json.load(file), mtime)
+
+    def _select_encoding(self, accept_encoding: str) -> str:
+        accepted = _accepted_encodings(accept_encoding)
+        for encoding in ("br", "gzip"):
+            if encoding in self.variants and accepted.get(encoding, accepted.get("*", 0)) > 0:
+                return encoding
+        return "identity"
+
+    def response(self, accept_encoding: str = "", if_none_match: Optional[str] = None) -> Response:
+        encoding = self._select_encoding(accept_encoding)
+        body, etag = self.variants[encoding]
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"public, max-age={QUESTIONNAIRE_MAX_AGE}",
+            "Vary": "Accept-Encoding",
+        }
+
+        if if_none_match:
+            candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            if "*" in candidates or candidates & self.etags:
+                return Response(status_code=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type="application/json", headers=headers)
+
+
+_payload: Optional[QuestionnairePayload] = None
+_payload_lock = threading.Lock()
+
+
+def get_questionnaire() -> QuestionnairePayload:
+    global _payload
+    # Анкета пересобирается, только если файл изменился
+    mtime = os.stat(QUESTIONNAIRE_PATH).st_mtime
+    if _payload is None or _payload.mtime != mtime:
+        with _payload_lock:
+            if _payload is None or _payload.mtime != mtime:
+                _payload = QuestionnairePayload.from_file(QUESTIONNAIRE_PATH)
+    return _payload
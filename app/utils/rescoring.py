@@ -0,0 +1,139 @@
+"""Пересчёт сохранённых результатов анкеты после изменения mockanswers.json.
+
+    python -m app.utils.rescoring --chunk-size 2000 --workers 4
+    python -m app.utils.rescoring --resume
+
+Строки читаются порциями по первичному ключу (keyset), каждая порция
+считается через AnswerCatalog.score_many и записывается одним оператором
+UPDATE ... FROM (VALUES ...) в своей короткой транзакции. Строки, в которых
+ни один выбранный ответ не нашёлся в новом справочнике, не перезаписываются
+(иначе пустые complaints позволили бы отправить анкету заново), а попадают в
+лог. После каждой порции, до которой все предыдущие уже записаны, в файл
+контрольной точки пишется последний id.
+"""
+import argparse
+import json
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import cast, column, select, update, values
+
+from app.dependencies.database.database import SessionLocal
+from app.models.all_models import TestResult
+from app.utils.answers import AnswerCatalog, get_answer_catalog, TEXT_FIELDS, POINT_FIELDS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT = Path("rescoring.checkpoint.json")
+RESULT_FIELDS = TEXT_FIELDS + POINT_FIELDS
+
+
+def read_chunks(chunk_size: int, after: Optional[UUID] = None):
+    while True:
+        query = select(TestResult.id, TestResult.selected_answer_ids).where(
+            TestResult.status == "COMPLETE",
+            TestResult.selected_answer_ids.isnot(None),
+        ).order_by(TestResult.id).limit(chunk_size)
+        if after is not None:
+            query = query.where(TestResult.id > after)
+
+        with SessionLocal() as db:
+            rows = db.execute(query).all()
+        if not rows:
+            return
+        yield rows
+        after = rows[-1].id
+
+
+def rescore_statement(rows: List[tuple]):
+    """UPDATE test_results ... FROM (VALUES ...) для строк (id, *RESULT_FIELDS)."""
+    table = TestResult.__table__
+    source = values(*(column(name, table.c[name].type) for name in ("id", *RESULT_FIELDS)),
+                    name="rescored").data(rows)
+    # psycopg2 подставляет параметры без типов, поэтому колонки VALUES приводятся явно
+    return (update(TestResult)
+            .where(TestResult.id == cast(source.c.id, table.c.id.type))
+            .values({name: cast(source.c[name], table.c[name].type) for name in RESULT_FIELDS})
+            .execution_options(synchronize_session=False))
+
+
+def rescore_chunk(catalog: AnswerCatalog, rows) -> Tuple[int, int]:
+    results = catalog.score_many([row.selected_answer_ids for row in rows])
+    updates = [(row.id, *(result[name] for name in RESULT_FIELDS))
+               for row, result in zip(rows, results) if result is not None]
+    unknown = [row.id for row, result in zip(rows, results) if result is None]
+    if unknown:
+        logger.warning("Skipped %d test results whose answers are all missing from the catalog: %s",
+                       len(unknown), ", ".join(map(str, unknown)))
+
+    if updates:
+        with SessionLocal() as db:
+            db.execute(rescore_statement(updates))
+            db.commit()
+    return len(updates), len(unknown)
+
+
+def load_checkpoint(path: Path, catalog: AnswerCatalog) -> Optional[UUID]:
+    if not path.exists():
+        return None
+    checkpoint = json.loads(path.read_text())
+    if checkpoint["catalog_mtime"] != catalog.mtime:
+        logger.warning("Answer catalog changed since the checkpoint was written, starting over")
+        return None
+    return UUID(checkpoint["last_id"])
+
+
+def save_checkpoint(path: Path, catalog: AnswerCatalog, last_id: UUID):
+    path.write_text(json.dumps({"last_id": str(last_id), "catalog_mtime": catalog.mtime}))
+
+
+def rescore(chunk_size: int = 2000, workers: int = 4, checkpoint: Path = DEFAULT_CHECKPOINT,
+            resume: bool = False) -> int:
+    catalog = get_answer_catalog()
+    after = load_checkpoint(checkpoint, catalog) if resume else None
+    total = skipped = 0
+    started = time.perf_counter()
+
+    # Порции пишутся параллельно, а контрольная точка двигается только по
+    # непрерывному префиксу записанных порций
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for rows in read_chunks(chunk_size, after):
+            pending.append((rows[-1].id, executor.submit(rescore_chunk, catalog, rows)))
+            while pending and (len(pending) > workers * 2 or pending[0][1].done()):
+                last_id, future = pending.popleft()
+                updated, unknown = future.result()
+                total, skipped = total + updated, skipped + unknown
+                save_checkpoint(checkpoint, catalog, last_id)
+
+        while pending:
+            last_id, future = pending.popleft()
+            updated, unknown = future.result()
+            total, skipped = total + updated, skipped + unknown
+            save_checkpoint(checkpoint, catalog, last_id)
+
+    logger.info("Rescored %d test results in %.1f s, skipped %d with no known answers",
+                total, time.perf_counter() - started, skipped)
+    checkpoint.unlink(missing_ok=True)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score stored test results with the current answer catalog")
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--checkpoint", type=Path, default=DEFAULT_CHECKPOINT)
+    parser.add_argument("--resume", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    rescore(args.chunk_size, args.workers, args.checkpoint, args.resume)
+
+
+if __name__ == "__main__":
+    main()
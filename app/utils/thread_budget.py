@@ -0,0 +1,120 @@
+"""Распределение ядер CPU между процессами, которые выполняют инференс.
+
+По умолчанию torch в каждом воркере gunicorn занимает потоками все ядра, и
+параллельные forward pass'ы нескольких воркеров мешают друг другу. Здесь
+ядра хоста (с учётом affinity и квоты cgroup) делятся поровну между
+процессами, и число потоков torch задаётся при старте воркера.
+"""
+import logging
+import math
+import os
+import sys
+from typing import NamedTuple, Optional
+
+from app.core.config import (INFERENCE_THREADS, INFERENCE_INTEROP_THREADS, INFERENCE_ADAPTIVE_THREADS,
+                             INFERENCE_IMAGES_PER_THREAD)
+
+logger = logging.getLogger(__name__)
+
+
+class ThreadBudget(NamedTuple):
+    cores: int
+    processes: int
+    intra_op: int
+    inter_op: int
+
+
+def _cgroup_cores() -> Optional[int]:
+    # cgroup v2, затем v1; "max" или -1 означают, что квоты нет
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as file:
+            quota, period = file.read().split()
+        if quota != "max":
+            return max(1, math.ceil(int(quota) / int(period)))
+        return None
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as file:
+            quota = int(file.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as file:
+            period = int(file.read())
+        if quota > 0:
+            return max(1, math.ceil(quota / period))
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def available_cores() -> int:
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    quota = _cgroup_cores()
+    return min(cores, quota) if quota else cores
+
+
+def plan(processes: int, cores: Optional[int] = None, threads: int = INFERENCE_THREADS,
+         interop_threads: int = INFERENCE_INTEROP_THREADS) -> ThreadBudget:
+    cores = cores or available_cores()
+    processes = max(1, processes)
+    intra_op = threads if threads > 0 else max(1, cores // processes)
+    return ThreadBudget(cores, processes, intra_op, max(1, interop_threads))
+
+
+_budget: Optional[ThreadBudget] = None
+
+
+def _apply_torch(budget: ThreadBudget):
+    import torch
+
+    torch.set_num_threads(budget.intra_op)
+    try:
+        torch.set_num_interop_threads(budget.inter_op)
+    except RuntimeError:
+        # Число inter-op потоков задаётся один раз на процесс; после fork оно уже унаследовано от мастера
+        pass
+
+
+def configure(processes: int, threads: int = INFERENCE_THREADS) -> ThreadBudget:
+    """Задаёт долю ядер для этого процесса, если их делят processes процессов.
+
+    Вызывается при старте каждого воркера; если torch уже импортирован
+    (preload_app), потоки меняются сразу, иначе — при загрузке модели.
+    """
+    global _budget
+    _budget = plan(processes, threads=threads)
+    if "torch" in sys.modules:
+        _apply_torch(_budget)
+    logger.info("Inference thread budget: %d of %d cores for each of %d processes",
+                _budget.intra_op, _budget.cores, _budget.processes)
+    return _budget
+
+
+def current() -> Optional[ThreadBudget]:
+    return _budget
+
+
+def on_model_load():
+    if _budget is not None:
+        _apply_torch(_budget)
+
+
+def threads_for(batch_size: int, budget: Optional[ThreadBudget] = None) -> int:
+    budget = budget or _budget
+    if budget is None:
+        return 0
+    if not INFERENCE_ADAPTIVE_THREADS:
+        return budget.intra_op
+    return max(1, min(budget.intra_op, math.ceil(batch_size / INFERENCE_IMAGES_PER_THREAD)))
+
+
+def adapt(batch_size: int):
+    """Маленьким батчам — меньше потоков: синхронизация потоков дороже выигрыша."""
+    threads = threads_for(batch_size)
+    if threads and INFERENCE_ADAPTIVE_THREADS:
+        import torch
+
+        if torch.get_num_threads() != threads:
+            torch.set_num_threads(threads)
@@ -0,0 +1,143 @@
+"""Выборка кадров для жестовых тестов из короткого видео.
+
+Ролик делится на равные отрезки, по одному на ожидаемый жест, и из каждого
+берётся group_size кадров: равномерно ("uniform") или самые неподвижные
+("motion" — наименьшая разница с предыдущим кадром). Кадры декодируются
+потоком, в память попадают только выбранные и уже уменьшенные до входа модели.
+"""
+import heapq
+from contextlib import contextmanager
+from typing import BinaryIO, List, Tuple
+
+import numpy as np
+
+from app.core.config import VIDEO_MAX_FRAMES
+
+try:
+    import av
+except ImportError:
+    av = None
+
+SAMPLING_MODES = ("uniform", "motion")
+MOTION_SIZE = 32
+
+
+def video_stream(container):
+    if not container.streams.video:
+        raise ValueError("No video stream")
+    return container.streams.video[0]
+
+
+def count_frames(file: BinaryIO) -> int:
+    file.seek(0)
+    with av.open(file, mode="r") as container:
+        stream = video_stream(container)
+        if stream.frames:
+            return stream.frames
+        # В контейнере нет числа кадров — считаем пакеты без декодирования
+        return sum(1 for packet in container.demux(stream) if packet.size)
+
+
+@contextmanager
+def decode(file: BinaryIO):
+    # Контекстный менеджер, а не генератор: контейнер закрывается сразу при выходе
+    # из with, даже если чтение кадров прервано break
+    file.seek(0)
+    with av.open(file, mode="r") as container:
+        stream = video_stream(container)
+        stream.thread_type = "AUTO"
+        yield enumerate(container.decode(stream))
+
+
+def segments(frame_count: int, group_sizes: List[int]) -> List[Tuple[int, int]]:
+    if frame_count < len(group_sizes):
+        raise ValueError("Video has fewer frames than expected gestures")
+    edges = np.linspace(0, frame_count, len(group_sizes) + 1).astype(int).tolist()
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def sample_uniform(file: BinaryIO, bounds: List[Tuple[int, int]], group_sizes: List[int],
+                   size: Tuple[int, int]) -> np.ndarray:
+    width, height = size
+    out = np.empty((sum(group_sizes), height, width, 3), dtype=np.uint8)
+
+    wanted = {}
+    slot = 0
+    for (start, end), count in zip(bounds, group_sizes):
+        for j in range(count):
+            wanted.setdefault(start + int((j + 0.5) * (end - start) / count), []).append(slot)
+            slot += 1
+
+    last = max(wanted)
+    last_frame = None
+    with decode(file) as frames:
+        for index, frame in frames:
+            last_frame = frame
+            if index in wanted:
+                out[wanted.pop(index)] = frame.to_ndarray(width=width, height=height, format="rgb24")
+            if index >= last:
+                break
+
+    # Если в метаданных кадров больше, чем реально декодировалось, добиваем последним
+    if wanted and last_frame is not None:
+        image = last_frame.to_ndarray(width=width, height=height, format="rgb24")
+        for slots in wanted.values():
+            out[slots] = image
+    elif wanted:
+        raise ValueError("Video has no decodable frames")
+    return out
+
+
+def sample_motion(file: BinaryIO, bounds: List[Tuple[int, int]], group_sizes: List[int],
+                  size: Tuple[int, int]) -> np.ndarray:
+    width, height = size
+    # Для каждого отрезка куча из group_size самых неподвижных кадров (по убыванию движения)
+    heaps: List[list] = [[] for _ in bounds]
+    segment = 0
+    previous = None
+
+    with decode(file) as frames:
+        for index, frame in frames:
+            while segment < len(bounds) - 1 and index >= bounds[segment][1]:
+                segment += 1
+            if index >= bounds[-1][1]:
+                break
+
+            thumbnail = frame.to_ndarray(width=MOTION_SIZE, height=MOTION_SIZE, format="gray").astype(np.int16)
+            motion = float(np.abs(thumbnail - previous).mean()) if previous is not None else float("inf")
+            previous = thumbnail
+
+            heap, count = heaps[segment], group_sizes[segment]
+            if len(heap) < count or -heap[0][0] > motion:
+                image = frame.to_ndarray(width=width, height=height, format="rgb24")
+                heapq.heappush(heap, (-motion, index, image))
+                if len(heap) > count:
+                    heapq.heappop(heap)
+
+    out = np.empty((sum(group_sizes), height, width, 3), dtype=np.uint8)
+    slot = 0
+    for heap, count in zip(heaps, group_sizes):
+        if not heap:
+            raise ValueError("Video has fewer frames than expected gestures")
+        chosen = [image for _, _, image in sorted(heap, key=lambda item: item[1])]
+        for j in range(count):
+            out[slot] = chosen[j % len(chosen)]
+            slot += 1
+    return out
+
+
+def sample_frames(file: BinaryIO, image_count: int, group_size: int, size: Tuple[int, int],
+                  mode: str = "uniform") -> np.ndarray:
+    """image_count кадров размера модели, сгруппированных по group_size, как фото в correct_count_batched."""
+    if av is None:
+        raise RuntimeError("PyAV is not installed")
+
+    frame_count = count_frames(file)
+    if frame_count > VIDEO_MAX_FRAMES:
+        raise ValueError(f"Video is longer than {VIDEO_MAX_FRAMES} frames")
+
+    group_sizes = [min(group_size, image_count - start) for start in range(0, image_count, group_size)]
+    bounds = segments(frame_count, group_sizes)
+    if mode == "motion":
+        return sample_motion(file, bounds, group_sizes, size)
+    return sample_uniform(file, bounds, group_sizes, size)
@@ -0,0 +1,151 @@
+"""Четыре загрузки /classify-gestures/{uuid} против одной /classify-gestures/{uuid}/all.
+
+Замеряются время от отправки до ответа и процессорное время на кадр
+(все потоки процесса). Кэш предсказаний отключается, чтобы каждый прогон
+честно проходил через модель. Если обученной модели нет рядом, берётся
+ViT той же архитектуры со случайными весами (--small — уменьшенный).
+--rtt-ms добавляет к каждому запросу задержку сети клиента (мобильная
+сеть — 50-150 мс), которой нет у ASGI-транспорта в одном процессе.
+Нужна локальная Postgres с применёнными миграциями (POSTGRES_* из .env).
+
+    python benchmarks/all_tests_endpoint.py --frames 12 --repeat 3
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ["PREDICTION_CACHE_SIZE"] = "0"
+os.environ["PREDICTION_CACHE_PATH"] = ""
+
+import httpx  # noqa: E402
+import numpy as np  # noqa: E402
+from PIL import Image  # noqa: E402
+from sqlalchemy import delete  # noqa: E402
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from app.dependencies.database.database import AsyncSessionLocal, async_engine  # noqa: E402
+from app.models.all_models import TestResult, User  # noqa: E402
+from app.utils import ai_integration  # noqa: E402
+from main import app  # noqa: E402
+
+USERNAME = "bench-multi-test"
+LABELS = ["fist", "palm", "thumb", "point"]
+
+
+def prepare_model(small: bool, directory: str):
+    if (ROOT / ai_integration.model_path).exists():
+        ai_integration.model_path = str(ROOT / ai_integration.model_path)
+        return
+    from transformers import ViTConfig, ViTForImageClassification, ViTImageProcessor
+
+    config = ViTConfig(num_labels=len(LABELS), id2label=dict(enumerate(LABELS)),
+                       label2id={label: i for i, label in enumerate(LABELS)})
+    if small:
+        config.hidden_size, config.num_hidden_layers, config.num_attention_heads = 192, 6, 3
+        config.intermediate_size = 768
+    ViTForImageClassification(config).save_pretrained(directory)
+    ViTImageProcessor().save_pretrained(directory)
+    ai_integration.model_path = directory
+
+
+def make_frames(count: int, size=(1280, 960)):
+    rng = np.random.default_rng(0)
+    frames = []
+    for _ in range(count):
+        buffer = io.BytesIO()
+        noise = rng.integers(0, 255, (size[1] // 16, size[0] // 16, 3), dtype=np.uint8)
+        Image.fromarray(noise).resize(size).save(buffer, format="JPEG", quality=90)
+        frames.append(buffer.getvalue())
+    return frames
+
+
+# Как на фронтенде: тесты 1–3 группами по 3 кадра, тест 4 — по 5
+GROUP_SIZES = {1: 3, 2: 3, 3: 3, 4: 5}
+
+
+async def four_calls(client, uuid, frames, names):
+    per_test = len(frames) // 4
+    for number in range(1, 5):
+        chunk = frames[(number - 1) * per_test:number * per_test]
+        response = await client.post(f"/classify-gestures/{uuid}", data={
+            "strict": 1, "group_size": GROUP_SIZES[number], "test_number": number, "gesture_names": ",".join(names[:per_test]),
+        }, files=[("images", (f"{i}.jpg", frame, "image/jpeg")) for i, frame in enumerate(chunk)])
+        response.raise_for_status()
+
+
+async def one_call(client, uuid, frames, names):
+    per_test = len(frames) // 4
+    tests = [{"test_number": number, "gesture_names": names[:per_test], "image_count": per_test,
+              "strict": True, "group_size": GROUP_SIZES[number]}
+             for number in range(1, 5)]
+    response = await client.post(f"/classify-gestures/{uuid}/all", data={"tests": json.dumps(tests)}, files=[("images", (f"{i}.jpg", frame, "image/jpeg")) for i, frame in enumerate(frames)])
+    response.raise_for_status()
+
+
+async def run(frames_per_test: int, repeat: int, rtt_ms: float):
+    frames = make_frames(frames_per_test * 4)
+    names = [LABELS[i // 3 % len(LABELS)] for i in range(frames_per_test)]
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(TestResult).where(TestResult.user.has(User.username == USERNAME)))
+        await db.execute(delete(User).where(User.username == USERNAME))
+        user = User(username=USERNAME, password="-", name="Bench", role="doctor")
+        db.add(user)
+        await db.flush()
+        test_result = TestResult(user_id=user.id, status="CREATED", patient_name="Bench")
+        db.add(test_result)
+        await db.commit()
+
+    samples = {"4 x /classify-gestures": [], "1 x /classify-gestures/all": []}
+
+    async def network_delay(request):
+        await asyncio.sleep(rtt_ms / 1000)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None,
+                                 event_hooks={"request": [network_delay]}) as client:
+        await one_call(client, test_result.id, frames, names)
+        for _ in range(repeat):
+            for name, call in zip(samples, (four_calls, one_call)):
+                wall, cpu = time.perf_counter(), time.process_time()
+                await call(client, test_result.id, frames, names)
+                samples[name].append((time.perf_counter() - wall, time.process_time() - cpu))
+
+    print(f"{len(frames)} frames ({frames_per_test} per test), batcher max batch "
+          f"{ai_integration.batcher.max_batch_size}, client RTT {rtt_ms:g} ms")
+    for name, runs in samples.items():
+        wall = statistics.median(run[0] for run in runs)
+        cpu = statistics.median(run[1] for run in runs)
+        print(f"{name:<28} {wall * 1000:>8.1f} ms end-to-end {cpu / len(frames) * 1000:>7.2f} ms CPU/frame")
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(TestResult).where(TestResult.id == test_result.id))
+        await db.execute(delete(User).where(User.username == USERNAME))
+        await db.commit()
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=12, help="кадров на один тест")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--small", action="store_true")
+    parser.add_argument("--rtt-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        prepare_model(args.small, directory)
+        ai_integration.load_model()
+        asyncio.run(run(args.frames, args.repeat, args.rtt_ms))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Скорость подсчёта результатов анкеты: прежний линейный проход против AnswerCatalog,
+и пакетный score_many против поштучного score для пересчёта истории.
+
+Текстовые значения синтетических ответов различны, как в худшем случае для
+справочника: время и пиковая память сборки должны расти линейно.
+
+    python benchmarks/answers.py
+"""
+import json
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from app.utils.answers import AnswerCatalog, TEXT_FIELDS, POINT_FIELDS  # noqa: E402
+
+CATALOG_SIZES = (138, 1_000, 10_000, 100_000)
+SELECTED = 40
+BATCH = 10_000
+
+
+def synthetic_answers(size: int):
+    base = json.loads((ROOT / "app/utils/data/mockanswers.json").read_text(encoding="utf-8"))["answers"]
+    answers = []
+    for i in range(size):
+        answer = {**base[i % len(base)], "answer_id": i + 1}
+        for field in TEXT_FIELDS:
+            if answer.get(field):
+                answer[field] = f"{answer[field]} #{i}"
+        answers.append(answer)
+    return answers
+
+
+def build(answers):
+    tracemalloc.start()
+    start = time.perf_counter()
+    catalog = AnswerCatalog(answers)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return catalog, elapsed * 1000, peak / 2 ** 20
+
+
+def linear_score(answers, selected_ids):
+    # Прежний путь /submit: проход по всему списку и множества по полям
+    selected = [answer for answer in answers if answer['answer_id'] in selected_ids]
+    unique_fields = {field: set() for field in TEXT_FIELDS}
+    total_points = {field: 0 for field in POINT_FIELDS}
+    for answer in selected:
+        for field in unique_fields:
+            if answer.get(field):
+                unique_fields[field].add(answer[field])
+        for field in total_points:
+            total_points[field] += answer.get(field, 0)
+    return {**{field: list(values) for field, values in unique_fields.items()}, **total_points}
+
+
+def per_call(func, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def main():
+    rng = random.Random(0)
+    print(f"{'answers':>8} {'build ms':>9} {'peak MB':>8} {'linear us':>11} {'catalog us':>11} {'speedup':>8}")
+    for size in CATALOG_SIZES:
+        answers = synthetic_answers(size)
+        catalog, build_ms, peak_mb = build(answers)
+        selected_ids = rng.sample(range(1, size + 1), SELECTED)
+
+        repeats = max(5, 200_000 // size)
+        linear = per_call(lambda: linear_score(answers, selected_ids), repeats)
+        indexed = per_call(lambda: catalog.score(selected_ids), repeats * 10)
+        print(f"{size:>8} {build_ms:>9.1f} {peak_mb:>8.1f} {linear:>11.1f} {indexed:>11.1f} "
+              f"{linear / indexed:>7.1f}x")
+
+    catalog = AnswerCatalog(synthetic_answers(138))
+    submissions = [rng.sample(range(1, 139), SELECTED) for _ in range(BATCH)]
+    single = per_call(lambda: [catalog.score(ids) for ids in submissions], 1)
+    batched = per_call(lambda: catalog.score_many(submissions), 1)
+    print(f"\n{BATCH} submissions: score {BATCH / single * 1e6:.0f}/s, score_many {BATCH / batched * 1e6:.0f}/s")
+
+
+if __name__ == "__main__":
+    main()
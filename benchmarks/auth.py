@@ -0,0 +1,88 @@
+"""Накладные расходы аутентификации на запрос: без кэша и с кэшем по токену.
+
+Сравнивается эндпоинт без авторизации и эндпоинт с get_current_user;
+разница медиан и есть цена аутентификации. Нужна локальная Postgres с
+применёнными миграциями (POSTGRES_* из .env).
+
+    python benchmarks/auth.py --requests 2000
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import delete
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.security.tokens import create_access_token  # noqa: E402
+from app.dependencies.current_user import get_current_user, principal_cache  # noqa: E402
+from app.dependencies.database.database import AsyncSessionLocal, async_engine  # noqa: E402
+from app.models.all_models import User  # noqa: E402
+
+USERNAME = "bench-auth"
+
+app = FastAPI()
+
+
+@app.get("/anonymous")
+async def anonymous():
+    return {"ok": True}
+
+
+@app.get("/authenticated")
+async def authenticated(current_user=Depends(get_current_user)):
+    return {"ok": True}
+
+
+async def measure(client: httpx.AsyncClient, path: str, headers: dict, requests: int) -> float:
+    samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        (await client.get(path, headers=headers)).raise_for_status()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+async def run(requests: int):
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(User).where(User.username == USERNAME))
+        db.add(User(username=USERNAME, password="-", name="Bench", role="doctor"))
+        await db.commit()
+
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': USERNAME})}"}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        await measure(client, "/authenticated", headers, 10)
+        baseline = await measure(client, "/anonymous", headers, requests)
+
+        max_entries = principal_cache.max_entries
+        principal_cache.max_entries = 0
+        principal_cache.invalidate_user(USERNAME)
+        uncached = await measure(client, "/authenticated", headers, requests)
+        principal_cache.max_entries = max_entries
+        cached = await measure(client, "/authenticated", headers, requests)
+
+    print(f"no auth            {baseline:.3f} ms")
+    print(f"auth without cache {uncached:.3f} ms  (+{uncached - baseline:.3f} ms)")
+    print(f"auth with cache    {cached:.3f} ms  (+{cached - baseline:.3f} ms)")
+    print(principal_cache.metrics())
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(User).where(User.username == USERNAME))
+        await db.commit()
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Сравнение бэкендов инференса с моделью float32 на папке изображений.
+
+Для каждого бэкенда печатаются доля совпадений меток с float32, время на
+изображение и прирост RSS при сборке бэкенда.
+
+    python benchmarks/backends.py validation_images --backends torch,int8,onnx
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from PIL import Image as PILImage
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from app.utils.inference_backends import BACKENDS, build_backend, load_validation_images  # noqa: E402
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/statm") as file:
+        return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+
+def evaluate(name: str, model, processor, images: List[PILImage.Image], onnx_path: str,
+             reference: List[int] = None, repeats: int = 5) -> Dict[str, float]:
+    pixel_values = processor(images=images, return_tensors="pt")["pixel_values"]
+
+    rss_before = _rss_mb()
+    backend = build_backend(name, model, onnx_path)
+    rss_after = _rss_mb()
+
+    labels = backend(pixel_values).argmax(-1).tolist()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        backend(pixel_values)
+        timings.append(time.perf_counter() - start)
+
+    if reference is None:
+        reference = labels
+    agreement = sum(a == b for a, b in zip(labels, reference)) / len(reference)
+
+    return {
+        "backend": name,
+        "agreement": agreement,
+        "ms_per_image": min(timings) / len(images) * 1000,
+        "rss_delta_mb": rss_after - rss_before,
+        "labels": labels,
+    }
+
+
+def main():
+    from transformers import ViTForImageClassification, ViTImageProcessor
+
+    parser = argparse.ArgumentParser(description="Compare inference backends against the float32 model")
+    parser.add_argument("image_dir")
+    parser.add_argument("--model-path", default="custom_hand_gestures_model_v2_28june")
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--onnx-path", default="gestures_model.onnx")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    model = ViTForImageClassification.from_pretrained(args.model_path)
+    processor = ViTImageProcessor.from_pretrained(args.model_path)
+    images = load_validation_images(args.image_dir)
+
+    baseline = evaluate("torch", model, processor, images, args.onnx_path, repeats=args.repeats)
+    print(f"{'backend':<12} {'agreement':>9} {'ms/image':>9} {'rss MB':>8}")
+    for name in args.backends.split(","):
+        row = baseline if name == "torch" else evaluate(
+            name, model, processor, images, args.onnx_path, reference=baseline["labels"], repeats=args.repeats)
+        print(f"{name:<12} {row['agreement']:>9.3f} {row['ms_per_image']:>9.2f} {row['rss_delta_mb']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Нагрузочный тест: синхронная сессия в async-обработчике против AsyncSession.
+
+Каждый запрос читает одну строку TestResult; --latency-ms добавляет
+pg_sleep, имитируя сетевую задержку до базы. Нужна локальная Postgres
+с применёнными миграциями (POSTGRES_* из .env).
+
+    python benchmarks/db_concurrency.py --requests 500 --concurrency 50 --latency-ms 5
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import select, text
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.dependencies.database.database import SessionLocal, AsyncSessionLocal, async_engine  # noqa: E402
+from app.models.all_models import TestResult  # noqa: E402
+
+app = FastAPI()
+latency = 0.0
+
+
+@app.get("/sync/{uuid}")
+async def sync_handler(uuid: str):
+    with SessionLocal() as db:
+        db.execute(text("SELECT pg_sleep(:seconds)"), {"seconds": latency})
+        return {"found": db.execute(select(TestResult.id).where(TestResult.id == uuid)).first() is not None}
+
+
+@app.get("/async/{uuid}")
+async def async_handler(uuid: str):
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("SELECT pg_sleep(:seconds)"), {"seconds": latency})
+        return {"found": (await db.execute(select(TestResult.id).where(TestResult.id == uuid))).first() is not None}
+
+
+async def run(path: str, requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    completions = []
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                (await client.get(path)).raise_for_status()
+                completions.append(time.perf_counter())
+
+        await one()
+        completions.clear()
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+
+    # Задержка считается от начала пачки, чтобы учесть ожидание заблокированного цикла событий
+    p99 = statistics.quantiles([done - start for done in completions], n=100)[98] * 1000
+    return requests / elapsed, p99
+
+
+async def main():
+    global latency
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=5)
+    args = parser.parse_args()
+    latency = args.latency_ms / 1000
+
+    with SessionLocal() as db:
+        uuid = db.execute(select(TestResult.id).limit(1)).scalar()
+
+    for name in ("sync", "async"):
+        throughput, p99 = await run(f"/{name}/{uuid}", args.requests, args.concurrency)
+        print(f"{name:<6} {throughput:>8.0f} req/s   p99 {p99:>7.1f} ms")
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+"""Время одной страницы /doctor/test-results в зависимости от числа строк врача.
+
+Для каждого размера врачу досеиваются строки до нужного числа, после чего
+замеряются первая страница, страница из середины (по курсору) и прежняя
+загрузка всех ORM-объектов. Нужна локальная Postgres с применёнными
+миграциями (POSTGRES_* из .env).
+
+    python benchmarks/doctor_pages.py --sizes 1000 10000 100000 --page-size 50
+"""
+import argparse
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import delete, func, insert, select, text
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.dependencies.database.database import SessionLocal  # noqa: E402
+from app.models.all_models import TestResult, User  # noqa: E402
+from app.routers.doctor_router import encode_cursor, test_results_page_query  # noqa: E402
+
+USERNAME = "bench-doctor-pages"
+
+
+def grow(db, user_id, size: int, chunk: int = 10_000):
+    existing = db.execute(select(func.count()).where(TestResult.user_id == user_id)).scalar()
+    start = datetime.utcnow() - timedelta(days=10 * 365)
+    for offset in range(existing, size, chunk):
+        db.execute(insert(TestResult), [
+            {"id": uuid.uuid4(), "user_id": user_id, "status": "COMPLETE", "patient_name": f"Patient {i}",
+             "created_at": start + timedelta(minutes=i), "complaints": ["a" * 40] * 5,
+             "recommendation_for_user": ["b" * 80] * 5, "recommendation_for_doctor": ["c" * 80] * 5}
+            for i in range(offset, min(offset + chunk, size))
+        ])
+    db.commit()
+    db.execute(text("ANALYZE test_results"))
+
+
+def timed(func, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--skip-full", action="store_true", help="не замерять загрузку всех строк")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        user = db.execute(select(User).where(User.username == USERNAME)).scalars().first()
+        if user is None:
+            user = User(username=USERNAME, password="-", name="Bench", role="doctor")
+            db.add(user)
+            db.commit()
+
+        print(f"{'rows':>8} {'first page':>12} {'middle page':>12} {'load all':>12}")
+        for size in sorted(args.sizes):
+            grow(db, user.id, size)
+            middle = db.execute(
+                select(TestResult.created_at, TestResult.id).where(TestResult.user_id == user.id)
+                .order_by(TestResult.created_at.desc(), TestResult.id.desc()).offset(size // 2).limit(1)
+            ).first()
+            first_page = test_results_page_query(user.id, args.page_size)
+            middle_page = test_results_page_query(user.id, args.page_size, encode_cursor(*middle))
+
+            first_ms = timed(lambda: db.execute(first_page).all(), args.repeat)
+            middle_ms = timed(lambda: db.execute(middle_page).all(), args.repeat)
+            full = "-"
+            if not args.skip_full:
+                full_ms = timed(lambda: db.execute(select(TestResult).where(TestResult.user_id == user.id))
+                                .scalars().all(), max(1, args.repeat // 10))
+                db.expunge_all()
+                full = f"{full_ms:.2f} ms"
+            print(f"{size:>8} {first_ms:>9.2f} ms {middle_ms:>9.2f} ms {full:>12}")
+
+        db.execute(delete(TestResult).where(TestResult.user_id == user.id))
+        db.delete(user)
+        db.commit()
+
+
+if __name__ == "__main__":
+    main()
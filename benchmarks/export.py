@@ -0,0 +1,70 @@
+"""Пиковая память и скорость потоковой выгрузки результатов врача.
+
+Строки досеиваются так же, как в doctor_pages.py; тело ответа читается и
+отбрасывается, пик памяти Python считается через tracemalloc (он же
+замедляет выгрузку, так что скорость здесь занижена). Нужна
+локальная Postgres с применёнными миграциями (POSTGRES_* из .env).
+
+    python benchmarks/export.py --sizes 10000 100000 --format csv
+"""
+import argparse
+import asyncio
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from sqlalchemy import delete, select
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.dependencies.database.database import SessionLocal, async_engine  # noqa: E402
+from app.models.all_models import TestResult, User  # noqa: E402
+from app.routers.doctor_router import EXPORT_COLUMNS, export_rows  # noqa: E402
+from doctor_pages import grow  # noqa: E402
+
+USERNAME = "bench-export"
+
+
+async def consume(user_id, export_format: str):
+    query = select(*EXPORT_COLUMNS).where(TestResult.user_id == user_id).order_by(TestResult.created_at,
+                                                                                  TestResult.id)
+    size = 0
+    tracemalloc.start()
+    started = time.perf_counter()
+    async for chunk in export_rows(query, export_format):
+        size += len(chunk)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    await async_engine.dispose()
+    return size, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        user = db.execute(select(User).where(User.username == USERNAME)).scalars().first()
+        if user is None:
+            user = User(username=USERNAME, password="-", name="Bench", role="doctor")
+            db.add(user)
+            db.commit()
+
+        print(f"{'rows':>8} {'body':>10} {'time':>9} {'rows/s':>9} {'peak memory':>12}")
+        for size in sorted(args.sizes):
+            grow(db, user.id, size)
+            body, elapsed, peak = asyncio.run(consume(user.id, args.format))
+            print(f"{size:>8} {body / 2 ** 20:>7.1f} MB {elapsed:>7.2f} s {size / elapsed:>9.0f} "
+                  f"{peak / 2 ** 20:>9.1f} MB")
+
+        db.execute(delete(TestResult).where(TestResult.user_id == user.id))
+        db.delete(user)
+        db.commit()
+
+
+if __name__ == "__main__":
+    main()
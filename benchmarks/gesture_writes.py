@@ -0,0 +1,100 @@
+"""Проверка записи результатов жестовых тестов под конкурентной нагрузкой.
+
+В каждом раунде четыре теста одной попытки записываются параллельно, в
+отдельных сессиях и в случайном порядке; затем gestures_result сверяется
+с суммой first_test..fourth_test. Для сравнения те же раунды гоняются
+через прежнюю схему SELECT + запись строки. Скрипт завершается с кодом 1,
+если новая схема дала хоть одно расхождение. Нужна локальная Postgres с
+применёнными миграциями (POSTGRES_* из .env). Та же проверка без замеров на
+одноразовой базе — tests/test_gesture_writes.py.
+
+    python benchmarks/gesture_writes.py --rounds 200
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from sqlalchemy import delete, select
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.dependencies.database.database import AsyncSessionLocal, async_engine  # noqa: E402
+from app.models.all_models import TestResult, User  # noqa: E402
+from app.utils.gesture_results import save_gesture_result  # noqa: E402
+
+USERNAME = "bench-gesture-writes"
+
+
+async def legacy_save(db, uuid, test_number: int, result: int):
+    test_result = (await db.execute(select(TestResult).where(TestResult.id == uuid))).scalars().first()
+    setattr(test_result, ("first_test", "second_test", "third_test", "fourth_test")[test_number - 1], result)
+    if test_number == 4:
+        test_result.gestures_result = sum([test_result.first_test or 0, test_result.second_test or 0,
+                                           test_result.third_test or 0, result])
+    await db.commit()
+
+
+async def write(save, uuid, test_number: int, result: int, latencies: list):
+    # Небольшой случайный сдвиг перемешивает порядок прихода тестов
+    await asyncio.sleep(random.random() * 0.002)
+    async with AsyncSessionLocal() as db:
+        started = time.perf_counter()
+        await save(db, uuid, test_number, result)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+async def run_rounds(save, user_id, rounds: int):
+    mismatches, latencies = 0, []
+    for _ in range(rounds):
+        async with AsyncSessionLocal() as db:
+            test_result = TestResult(user_id=user_id, status="CREATED", patient_name="Bench")
+            db.add(test_result)
+            await db.commit()
+
+        results = {test_number: random.randint(0, 10) for test_number in range(1, 5)}
+        order = random.sample(list(results), len(results))
+        await asyncio.gather(*(write(save, test_result.id, n, results[n], latencies) for n in order))
+
+        async with AsyncSessionLocal() as db:
+            stored = (await db.execute(select(TestResult).where(TestResult.id == test_result.id))).scalars().first()
+        if stored.gestures_result != sum(results.values()):
+            mismatches += 1
+    return mismatches, statistics.median(latencies)
+
+
+async def run(rounds: int) -> int:
+    async with AsyncSessionLocal() as db:
+        user = (await db.execute(select(User).where(User.username == USERNAME))).scalars().first()
+        if user is None:
+            user = User(username=USERNAME, password="-", name="Bench", role="doctor")
+            db.add(user)
+            await db.commit()
+
+    failed = 0
+    for name, save in (("SELECT + row flush", legacy_save), ("UPDATE ... RETURNING", save_gesture_result)):
+        mismatches, latency = await run_rounds(save, user.id, rounds)
+        print(f"{name:<22} {mismatches:>4}/{rounds} inconsistent gestures_result, median write {latency:.2f} ms")
+        if save is save_gesture_result:
+            failed = mismatches
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(TestResult).where(TestResult.user_id == user.id))
+        await db.execute(delete(User).where(User.id == user.id))
+        await db.commit()
+    await async_engine.dispose()
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+    sys.exit(1 if asyncio.run(run(args.rounds)) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Инференс в процессе веб-воркера против отдельного сервера инференса.
+
+Запускает app.utils.inference_server на Unix-сокете и сравнивает задержку
+и пропускную способность запросов по --frames кадров при --concurrency
+параллельных запросах, а также пиковую память веб-воркера в обоих режимах.
+Если обученной модели нет, берётся ViT со случайными весами (как в
+all_tests_endpoint.py).
+
+    python benchmarks/inference_server.py --frames 12 --requests 40 --concurrency 4 --small
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+PROBE = """
+import re, sys, time
+import numpy as np
+start = time.perf_counter()
+from app.utils import ai_integration
+ai_integration.model_path = sys.argv[1]
+ai_integration.warm_up()
+ready = time.perf_counter() - start
+width, height = ai_integration.input_size()
+ai_integration.batcher.submit(np.zeros((12, height, width, 3), dtype=np.uint8)).result()
+# ru_maxrss наследуется через fork/exec, VmHWM относится только к этому процессу
+peak = int(re.search(r"VmHWM:\\s+(\\d+)", open("/proc/self/status").read()).group(1))
+print(ready, peak / 1024, "torch" in sys.modules)
+"""
+
+
+def measure(batcher, frames: np.ndarray, requests: int, concurrency: int):
+    def one():
+        started = time.perf_counter()
+        batcher.submit(frames).result()
+        return time.perf_counter() - started
+
+    one()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        started = time.perf_counter()
+        latencies = list(pool.map(lambda _: one(), range(requests)))
+        elapsed = time.perf_counter() - started
+    p99 = statistics.quantiles(latencies, n=100)[98]
+    return requests * len(frames) / elapsed, statistics.median(latencies), p99
+
+
+def probe(model_dir: str, env: dict):
+    output = subprocess.run([sys.executable, "-c", PROBE, model_dir], env=env, cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout.split()
+    return float(output[0]), float(output[1]), output[2] == "True"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=12)
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--small", action="store_true")
+    args = parser.parse_args()
+
+    from all_tests_endpoint import prepare_model
+    from app.utils import ai_integration
+    from app.utils.inference_batcher import MicroBatcher
+    from app.utils.inference_client import InferenceClient
+
+    with tempfile.TemporaryDirectory() as directory:
+        prepare_model(args.small, directory)
+        model_dir = ai_integration.model_path
+        address = f"unix:{directory}/inference.sock"
+        env = {**os.environ, "PREDICTION_CACHE_SIZE": "0", "PREDICTION_CACHE_PATH": ""}
+
+        server = subprocess.Popen([sys.executable, "-m", "app.utils.inference_server", "--address", address,
+                                   "--model-path", model_dir], cwd=ROOT, env=env)
+        try:
+            while not os.path.exists(address[len("unix:"):]):
+                if server.poll() is not None:
+                    raise RuntimeError("Inference server exited")
+                time.sleep(0.1)
+
+            width, height = ai_integration.input_size()
+            frames = np.random.default_rng(0).integers(0, 255, (args.frames, height, width, 3), dtype=np.uint8)
+            client = InferenceClient(address)
+            remote = measure(client, frames, args.requests, args.concurrency)
+
+            ai_integration.warm_up()
+            local = measure(MicroBatcher(ai_integration.predict_batch), frames, args.requests, args.concurrency)
+
+            local_worker = probe(model_dir, {**env, "INFERENCE_SERVER": ""})
+            client_worker = probe(model_dir, {**env, "INFERENCE_SERVER": address})
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"{args.frames} frames per request, {args.requests} requests, concurrency {args.concurrency}")
+    print(f"{'mode':<16} {'images/s':>9} {'p50':>9} {'p99':>9} {'worker ready':>13} {'worker RSS':>11} torch")
+    for name, (throughput, p50, p99), (ready, rss, torch_loaded) in (
+            ("in-process", local, local_worker), ("inference server", remote, client_worker)):
+        print(f"{name:<16} {throughput:>9.1f} {p50 * 1000:>6.1f} ms {p99 * 1000:>6.1f} ms {ready:>11.2f} s "
+              f"{rss:>8.0f} MB {'yes' if torch_loaded else 'no'}")
+
+
+if __name__ == "__main__":
+    main()
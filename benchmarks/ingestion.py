@@ -0,0 +1,72 @@
+"""Пиковая память и время декодирования больших JPEG с камеры телефона.
+
+"full" — прежний путь: file.read() -> BytesIO -> декодирование в полном
+разрешении, все изображения живут до конца запроса.
+"draft" — decode_files: draft-декодирование сразу в буфер размера входа модели.
+
+    python benchmarks/ingestion.py --images 12
+"""
+import argparse
+import io
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def make_jpeg(path: Path, size=(4032, 3024)):
+    import numpy as np
+    from PIL import Image
+
+    noise = np.random.default_rng(0).integers(0, 255, (size[1] // 8, size[0] // 8, 3), dtype=np.uint8)
+    Image.fromarray(noise).resize(size).save(path, quality=90)
+
+
+def run(mode: str, path: Path, count: int):
+    from PIL import Image
+
+    files = [open(path, "rb") for _ in range(count)]
+    start = time.perf_counter()
+    if mode == "full":
+        images = [Image.open(io.BytesIO(file.read())).convert("RGB") for file in files]
+        images = [image.resize((224, 224), Image.BILINEAR) for image in images]
+    else:
+        import numpy as np
+        from app.utils import ai_integration
+
+        ai_integration.input_size = lambda: (224, 224)
+        ai_integration._preprocessor_config = lambda: {"resample": Image.BILINEAR}
+        batch = np.empty((count, 224, 224, 3), dtype=np.uint8)
+        for i, file in enumerate(files):
+            ai_integration.decode_into(file, batch[i])
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{mode:<6} {elapsed / count * 1000:>8.1f} ms/image {peak_mb:>8.1f} MB peak RSS")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=12)
+    parser.add_argument("--mode")
+    parser.add_argument("--path")
+    args = parser.parse_args()
+
+    if args.mode:
+        run(args.mode, Path(args.path), args.images)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "camera.jpg"
+        make_jpeg(path)
+        for mode in ("full", "draft"):
+            subprocess.check_call([sys.executable, __file__, "--mode", mode, "--path", str(path),
+                                   "--images", str(args.images)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Пропускная способность /login/ при выбранной стоимости scrypt и задержка цикла событий.
+
+Одновременно отправляется --concurrency логинов; параллельно тикер раз в
+5 мс замеряет, насколько цикл событий опаздывает. Стоимость задаётся
+переменными PASSWORD_SCRYPT_N/R/P, пул — PASSWORD_HASH_WORKERS. Нужна
+локальная Postgres с применёнными миграциями (POSTGRES_* из .env).
+
+    PASSWORD_SCRYPT_N=16384 python benchmarks/passwords.py --logins 200 --concurrency 50
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from sqlalchemy import delete
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.config import PASSWORD_SCRYPT_N, PASSWORD_SCRYPT_R, PASSWORD_SCRYPT_P, PASSWORD_HASH_WORKERS  # noqa: E402
+from app.core.security.passwords import hash_password  # noqa: E402
+from app.dependencies.database.database import AsyncSessionLocal, async_engine  # noqa: E402
+from app.models.all_models import User  # noqa: E402
+from main import app  # noqa: E402
+
+USERNAME = "bench-passwords"
+PASSWORD = "correct horse battery staple"
+
+
+async def ticker(lags: list, stop: asyncio.Event, interval: float = 0.005):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - started - interval)
+
+
+async def run(logins: int, concurrency: int):
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(User).where(User.username == USERNAME))
+        db.add(User(username=USERNAME, password=hash_password(PASSWORD), name="Bench", role="doctor"))
+        await db.commit()
+
+    semaphore = asyncio.Semaphore(concurrency)
+    lags, stop = [], asyncio.Event()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def login():
+            async with semaphore:
+                response = await client.post("/login/", json={"username": USERNAME, "password": PASSWORD})
+                response.raise_for_status()
+
+        await login()
+        tick = asyncio.create_task(ticker(lags, stop))
+        started = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await tick
+
+    print(f"scrypt n={PASSWORD_SCRYPT_N} r={PASSWORD_SCRYPT_R} p={PASSWORD_SCRYPT_P}, "
+          f"{PASSWORD_HASH_WORKERS} hash workers")
+    print(f"{logins / elapsed:.1f} logins/s, {elapsed / logins * 1000:.1f} ms per login on average")
+    quantiles = statistics.quantiles(lags, n=100)
+    print(f"event loop lag: median {statistics.median(lags) * 1000:.1f} ms, p99 {quantiles[98] * 1000:.1f} ms, "
+          f"max {max(lags) * 1000:.1f} ms")
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(User).where(User.username == USERNAME))
+        await db.commit()
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.logins, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
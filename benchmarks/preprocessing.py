@@ -0,0 +1,48 @@
+"""Сравнение Normalizer с ViTImageProcessor: совпадение выходов и пропускная способность.
+
+    python benchmarks/preprocessing.py
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from transformers import ViTImageProcessor
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.utils.preprocessing import Normalizer  # noqa: E402
+
+BATCH_SIZES = (1, 2, 4, 8, 16, 32, 64)
+
+
+def best_of(func, repeats: int = 5) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    processor = ViTImageProcessor()
+    normalizer = Normalizer.from_processor(processor)
+    size = processor.size["height"], processor.size["width"]
+    rng = np.random.default_rng(0)
+
+    print(f"{'batch':>5} {'processor img/s':>16} {'normalizer img/s':>17} {'speedup':>8}")
+    for batch_size in BATCH_SIZES:
+        batch = rng.integers(0, 256, (batch_size, *size, 3), dtype=np.uint8)
+
+        expected = processor(images=list(batch), return_tensors="np")["pixel_values"]
+        actual = normalizer(batch).numpy()
+        assert np.array_equal(expected, actual), f"outputs differ at batch size {batch_size}"
+
+        reference = best_of(lambda: processor(images=list(batch), return_tensors="pt"))
+        fused = best_of(lambda: normalizer(batch))
+        print(f"{batch_size:>5} {batch_size / reference:>16.0f} {batch_size / fused:>17.0f} {reference / fused:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
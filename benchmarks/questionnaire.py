@@ -0,0 +1,57 @@
+"""Пропускная способность /get_test/: прежний обработчик против заранее сериализованной анкеты.
+
+    python benchmarks/questionnaire.py --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from main import app  # noqa: E402
+
+legacy_app = FastAPI()
+
+
+@legacy_app.get("/get_test/")
+async def legacy_get_module_data():
+    with open(ROOT / "mocktest.json", "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+async def run(target, requests: int, headers: dict) -> float:
+    transport = httpx.ASGITransport(app=target)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get("/get_test/", headers=headers)
+        start = time.perf_counter()
+        for _ in range(requests):
+            await client.get("/get_test/", headers=headers)
+        return requests / (time.perf_counter() - start)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    identity = {"accept-encoding": "identity"}
+    gzip = {"accept-encoding": "gzip"}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        etag = (await client.get("/get_test/", headers=gzip)).headers["etag"]
+    revalidate = {**gzip, "if-none-match": etag}
+
+    print(f"legacy handler:        {await run(legacy_app, args.requests, identity):>8.0f} req/s")
+    print(f"precomputed identity:  {await run(app, args.requests, identity):>8.0f} req/s")
+    print(f"precomputed gzip:      {await run(app, args.requests, gzip):>8.0f} req/s")
+    print(f"If-None-Match -> 304:  {await run(app, args.requests, revalidate):>8.0f} req/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
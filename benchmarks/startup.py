@@ -0,0 +1,44 @@
+"""Время импорта приложения против времени загрузки модели.
+
+До ленивой загрузки модель грузилась при импорте main, поэтому
+"import + model" соответствует старому времени старта воркера.
+
+    python benchmarks/startup.py --runs 5
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PROBE = """
+import time
+start = time.perf_counter()
+import main
+imported = time.perf_counter() - start
+from app.utils.ai_integration import load_model
+load_model()
+print(imported, time.perf_counter() - start)
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    imported, loaded = [], []
+    for _ in range(args.runs):
+        output = subprocess.check_output([sys.executable, "-c", PROBE], cwd=ROOT, text=True)
+        first, second = map(float, output.split()[-2:])
+        imported.append(first)
+        loaded.append(second)
+
+    print(f"import main:         {statistics.median(imported):.3f} s")
+    print(f"import main + model: {statistics.median(loaded):.3f} s")
+
+
+if __name__ == "__main__":
+    main()
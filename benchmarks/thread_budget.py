@@ -0,0 +1,118 @@
+"""Матрица воркеры × потоки torch × размер батча для распределения ядер.
+
+Для каждого числа воркеров запускаются процессы с моделью (как воркеры
+gunicorn), и все они одновременно гоняют predict_batch в течение --duration
+секунд. Печатаются суммарная пропускная способность и p50/p99 одного
+forward pass. Значения --threads: "budget" — доля ядер из thread_budget,
+"all" — все ядра в каждом воркере (поведение torch по умолчанию),
+"adaptive" — доля ядер с подстройкой под размер батча, или число.
+
+Форму хоста можно имитировать через affinity:
+
+    taskset -c 0-3 python benchmarks/thread_budget.py --workers 1,2,4 --batch 1,8,32 --small
+"""
+import argparse
+import multiprocessing
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def worker(model_dir: str, processes: int, connection, barrier):
+    import numpy as np
+    from app.utils import ai_integration, thread_budget
+
+    ai_integration.model_path = model_dir
+    ai_integration.load_model()
+    width, height = ai_integration.input_size()
+    frames = np.random.default_rng(0).integers(0, 255, (64, height, width, 3), dtype=np.uint8)
+    connection.send("ready")
+
+    while (command := connection.recv()) is not None:
+        threads, adaptive, batch_size, duration = command
+        thread_budget.INFERENCE_ADAPTIVE_THREADS = adaptive
+        thread_budget.configure(processes, threads=threads)
+        batch = frames[:batch_size]
+        ai_integration.predict_batch(batch)
+
+        barrier.wait()
+        latencies = []
+        deadline = time.perf_counter() + duration
+        while (started := time.perf_counter()) < deadline:
+            ai_integration.predict_batch(batch)
+            latencies.append(time.perf_counter() - started)
+        connection.send(latencies)
+
+
+def run(context, model_dir: str, processes: int, settings, batches, duration: float):
+    from app.utils.thread_budget import available_cores
+
+    barrier = context.Barrier(processes)
+    connections, children = [], []
+    for _ in range(processes):
+        parent, child = context.Pipe()
+        process = context.Process(target=worker, args=(model_dir, processes, child, barrier), daemon=True)
+        process.start()
+        connections.append(parent)
+        children.append(process)
+    for connection in connections:
+        connection.recv()
+
+    rows = []
+    for setting in settings:
+        threads = {"budget": 0, "adaptive": 0, "all": available_cores()}.get(setting)
+        if threads is None:
+            threads = int(setting)
+        for batch_size in batches:
+            for connection in connections:
+                connection.send((threads, setting == "adaptive", batch_size, duration))
+            latencies = [latency for connection in connections for latency in connection.recv()]
+            p99 = statistics.quantiles(latencies, n=100)[98] if len(latencies) > 1 else latencies[0]
+            rows.append((processes, setting, batch_size, len(latencies) * batch_size / duration,
+                         statistics.median(latencies), p99))
+
+    for connection in connections:
+        connection.send(None)
+    for process in children:
+        process.join()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", default="1,2,3")
+    parser.add_argument("--threads", default="budget,all,adaptive")
+    parser.add_argument("--batch", default="1,8,32")
+    parser.add_argument("--duration", type=float, default=5)
+    parser.add_argument("--small", action="store_true")
+    args = parser.parse_args()
+
+    from all_tests_endpoint import prepare_model
+    from app.utils import ai_integration
+    from app.utils.thread_budget import available_cores, plan
+
+    settings = args.threads.split(",")
+    batches = [int(size) for size in args.batch.split(",")]
+    # spawn: torch в родителе уже инициализирован, fork его пулов потоков небезопасен
+    context = multiprocessing.get_context("spawn")
+
+    print(f"{available_cores()} cores available")
+    print(f"{'workers':>7} {'threads':>9} {'batch':>5} {'images/s':>9} {'p50':>10} {'p99':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        prepare_model(args.small, directory)
+        for processes in (int(count) for count in args.workers.split(",")):
+            for row in run(context, ai_integration.model_path, processes, settings, batches, args.duration):
+                workers, setting, batch_size, throughput, p50, p99 = row
+                if setting in ("budget", "adaptive"):
+                    setting = f"{setting[0]}:{plan(workers).intra_op}"
+                print(f"{workers:>7} {setting:>9} {batch_size:>5} {throughput:>9.1f} "
+                      f"{p50 * 1000:>7.1f} ms {p99 * 1000:>7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Видеоролик против набора фото для одного жестового теста.
+
+Сравнивается объём загрузки и число частей multipart-запроса, а также
+время и пиковая память выборки кадров: "uniform" и "motion" из
+video_frames против наивного декодирования всего ролика в массивы.
+Ролик синтетический: на каждый жест фигура держится неподвижно, между
+жестами перемещается.
+
+    python benchmarks/video.py --gestures 4 --group-size 3 --seconds-per-gesture 1.5
+"""
+import argparse
+import io
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def make_clip(path: Path, gestures: int, seconds: float, size=(1280, 720), fps: int = 30):
+    import av
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 255, (size[1] // 8, size[0] // 8, 3), dtype=np.uint8).repeat(8, 0).repeat(8, 1)
+    frames_per_gesture = int(seconds * fps)
+    with av.open(str(path), "w") as container:
+        stream = container.add_stream("libx264", rate=fps)
+        stream.width, stream.height, stream.pix_fmt = size[0], size[1], "yuv420p"
+        for gesture in range(gestures):
+            for i in range(frames_per_gesture):
+                # Первая треть отрезка — переход к новой позе, дальше поза удерживается
+                progress = min(i / (frames_per_gesture / 3), 1.0)
+                x = int((gesture + progress) * (size[0] - 300) / gestures)
+                image = background.copy()
+                image[200:500, x:x + 300] = (60 * gesture % 255, 200, 255 - 60 * gesture % 255)
+                for packet in stream.encode(av.VideoFrame.from_ndarray(image, format="rgb24")):
+                    container.mux(packet)
+        for packet in stream.encode():
+            container.mux(packet)
+
+
+def make_photo(size=(4032, 3024)) -> bytes:
+    import numpy as np
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    noise = np.random.default_rng(0).integers(0, 255, (size[1] // 8, size[0] // 8, 3), dtype=np.uint8)
+    Image.fromarray(noise).resize(size).save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def run(mode: str, path: Path, image_count: int, group_size: int):
+    start = time.perf_counter()
+    with open(path, "rb") as file:
+        if mode == "full":
+            import av
+
+            with av.open(file) as container:
+                frames = [frame.to_ndarray(format="rgb24") for frame in container.decode(video=0)]
+            count = len(frames)
+        else:
+            from app.utils.video_frames import sample_frames
+
+            count = len(sample_frames(file, image_count, group_size, (224, 224), mode))
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{mode:<8} {count:>5} frames {elapsed * 1000:>8.1f} ms {peak_mb:>8.1f} MB peak RSS")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--gestures", type=int, default=4)
+    parser.add_argument("--group-size", type=int, default=3)
+    parser.add_argument("--seconds-per-gesture", type=float, default=1.5)
+    parser.add_argument("--mode")
+    parser.add_argument("--path")
+    args = parser.parse_args()
+    image_count = args.gestures * args.group_size
+
+    if args.mode:
+        run(args.mode, Path(args.path), image_count, args.group_size)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        clip = Path(directory) / "clip.mp4"
+        make_clip(clip, args.gestures, args.seconds_per_gesture)
+        photos = len(make_photo()) * image_count
+        print(f"photos: {image_count} parts, {photos / 2 ** 20:.1f} MB")
+        print(f"video:  1 part, {clip.stat().st_size / 2 ** 20:.1f} MB "
+              f"({photos / clip.stat().st_size:.0f}x less)")
+        for mode in ("full", "uniform", "motion"):
+            subprocess.run([sys.executable, __file__, "--mode", mode, "--path", str(clip),
+                            "--gestures", str(args.gestures), "--group-size", str(args.group_size)], check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import gc
+from os import getenv
+
+bind = getenv("GUNICORN_BIND", "0.0.0.0:8872")
+workers = int(getenv("GUNICORN_WORKERS", 3))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Приложение (и веса модели) загружается один раз в мастере, воркеры получают
+# их через fork в режиме copy-on-write
+preload_app = getenv("GUNICORN_PRELOAD_APP", "1") == "1"
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+
+    from app.core.config import INFERENCE_SERVER
+
+    # С отдельным сервером инференса модель в веб-воркерах не нужна
+    if not INFERENCE_SERVER:
+        from app.utils.ai_integration import load_model
+        load_model()
+
+    # Переносим загруженные объекты в постоянное поколение, чтобы сборщик мусора
+    # в воркерах не трогал их страницы и не вызывал копирование
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Каждому воркеру — своя доля ядер для потоков torch
+    from app.utils import thread_budget
+    thread_budget.configure(server.cfg.workers)
+
+    # Соединения из пула мастера не должны использоваться в воркерах
+    from app.dependencies.database.database import engine, async_engine
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
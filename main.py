@@ -1,20 +1,27 @@
 import json
-from pathlib import Path
+import threading
 from typing import List, Dict
 
 from pydantic import BaseModel, UUID4
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import Session
-from fastapi import FastAPI, HTTPException, Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
+from app.core.config import MODEL_LOADING, INFERENCE_SERVER
+from app.core.security.passwords import hash_password_async, verify_password_async
 from app.core.security.tokens import create_access_token
 from app.dependencies.current_user import get_current_user
 from app.dependencies.database.database import get_db
 from app.models.all_models import TestResult, User
 from app.routers.doctor_router import router as DoctorRouter
 from app.routers.gestures_router import router as GesturesRouter
-from app.utils.answers import load_answers, process_selected_answers
+from app.utils.ai_integration import is_model_ready, warm_up
+from app.utils.answers import get_answer_catalog
+from app.utils.gesture_jobs import start_job_workers
+from app.utils.questionnaire import get_questionnaire
 
 app = FastAPI()
 
@@ -24,19 +31,53 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 app.include_router(DoctorRouter)
 app.include_router(GesturesRouter)
 
 
+@app.on_event("startup")
+def load_gestures_model():
+    if MODEL_LOADING == "eager":
+        warm_up()
+    elif MODEL_LOADING == "background":
+        threading.Thread(target=warm_up, name="model-warm-up", daemon=True).start()
+
+
+@app.on_event("startup")
+def load_static_data():
+    get_answer_catalog()
+    get_questionnaire()
+
+
+@app.on_event("startup")
+async def start_gesture_job_workers():
+    start_job_workers()
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+async def ready():
+    if await is_model_ready():
+        return {"status": "ready", "model": True}
+    # В ленивом режиме модель грузит первый запрос жестов: если ждать её здесь,
+    # проба готовности не пропустит этот запрос никогда
+    if MODEL_LOADING == "lazy" and not INFERENCE_SERVER:
+        return {"status": "ready", "model": "lazy"}
+    return JSONResponse(status_code=503, content={"status": "loading", "model": False})
+
+
 @app.get("/get_test/")
-async def get_module_data():
+async def get_module_data(request: Request):
     try:
-        json_file_path = Path(__file__).parent / "mocktest.json"
-        with open(json_file_path, "r", encoding="utf-8") as file:
-            data = json.load(file)
-        return data
+        payload = get_questionnaire()
+        return payload.response(request.headers.get("accept-encoding", ""), request.headers.get("if-none-match"))
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Module data file not found")
     except json.JSONDecodeError:
@@ -55,27 +96,36 @@ class UserLogin(BaseModel):
     password: str
 
 
-def get_user(db: Session, username: str):
-    return db.query(User).filter(User.username == username).first()
+async def get_user(db: AsyncSession, username: str):
+    return (await db.execute(select(User).where(User.username == username))).scalars().first()
+
+
+async def get_test_result_row(db: AsyncSession, uuid) -> TestResult:
+    return (await db.execute(select(TestResult).where(TestResult.id == uuid))).scalars().first()
 
 
 @app.post("/register/")
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = get_user(db, username=user.username)
+async def register_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
+    db_user = await get_user(db, username=user.username)
     if db_user:
         raise HTTPException(status_code=400, detail="Username already registered")
-    new_user = User(username=user.username, password=user.password, name=user.name, role=user.role)
+    password = await hash_password_async(user.password)
+    new_user = User(username=user.username, password=password, name=user.name, role=user.role)
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
     return {"message": "User created successfully"}
 
 
 @app.post("/login/")
-def login(user: UserLogin, db: Session = Depends(get_db)):
-    db_user = get_user(db, username=user.username)
-    if not db_user or db_user.password != user.password:
+async def login(user: UserLogin, db: AsyncSession = Depends(get_db)):
+    db_user = await get_user(db, username=user.username)
+    matches, needs_rehash = await verify_password_async(user.password, db_user.password if db_user else None)
+    if not matches:
         raise HTTPException(status_code=400, detail="Incorrect username or password")
+    if needs_rehash:
+        # Старые пароли в открытом виде и хэши с устаревшими параметрами пересчитываются при входе
+        db_user.password = await hash_password_async(user.password)
+        await db.commit()
     token = create_access_token(data={"sub": user.username})
     return {"access_token": token, "token_type": "bearer"}
 
@@ -87,8 +137,8 @@ class SubmitTestResultInput(BaseModel):
 
 
 @app.get("/test_result/{uuid}")
-async def get_test_result(uuid: UUID4, db: Session = Depends(get_db)):
-    test_result = db.query(TestResult).filter(TestResult.id == uuid).first()
+async def get_test_result(uuid: UUID4, db: AsyncSession = Depends(get_db)):
+    test_result = await get_test_result_row(db, uuid)
     if not test_result:
         raise HTTPException(status_code=404, detail="TestResult not found")
 
@@ -113,33 +163,30 @@ async def get_test_result(uuid: UUID4, db: Session = Depends(get_db)):
 
 
 @app.post("/submit/{uuid}")
-async def submit_test_result(uuid: UUID4, input_data: SubmitTestResultInput, db: Session = Depends(get_db)):
+async def submit_test_result(uuid: UUID4, input_data: SubmitTestResultInput, db: AsyncSession = Depends(get_db)):
     try:
-        test_result = db.query(TestResult).filter(TestResult.id == uuid).first()
+        test_result = await get_test_result_row(db, uuid)
         if not test_result:
             raise HTTPException(status_code=404, detail="TestResult not found")
 
         if test_result.complaints:
             raise HTTPException(status_code=400, detail="Test result already submitted")
 
-        answers_data = load_answers()
-        selected_answers = [answer for answer in answers_data if answer['answer_id'] in input_data.selectedAnswerIds]
-
-        result = process_selected_answers(selected_answers)
+        result = get_answer_catalog().score(input_data.selectedAnswerIds)
 
         # Обновляем существующий TestResult
         for key, value in result.items():
             setattr(test_result, key, value)
 
+        test_result.selected_answer_ids = list(dict.fromkeys(input_data.selectedAnswerIds))
         test_result.height = input_data.height
         test_result.weight = input_data.weight
         test_result.status = "COMPLETE"
-        db.commit()
-        db.refresh(test_result)
+        await db.commit()
 
         return result
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
@@ -153,15 +200,15 @@ class DiagnosisRequest(BaseModel):
 async def update_diagnosis(
         uuid: str,
         diagnosis_data: DiagnosisRequest,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
         current_user: Dict = Depends(get_current_user)
 ):
-    test_result = db.query(TestResult).filter(TestResult.id == uuid).first()
+    test_result = await get_test_result_row(db, uuid)
     if not test_result:
         raise HTTPException(status_code=404, detail="Test result not found")
 
     test_result.diagnosis = diagnosis_data.diagnosis
-    db.commit()
+    await db.commit()
 
     return {"status": "success", "message": "Diagnosis updated successfully"}
 
@@ -174,14 +221,14 @@ class DegreeRequest(BaseModel):
 async def update_diagnosis(
         uuid: str,
         degree_data: DegreeRequest,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
         current_user: Dict = Depends(get_current_user)
 ):
-    test_result = db.query(TestResult).filter(TestResult.id == uuid).first()
+    test_result = await get_test_result_row(db, uuid)
     if not test_result:
         raise HTTPException(status_code=404, detail="Test result not found")
 
     test_result.degree = degree_data.degree
-    db.commit()
+    await db.commit()
 
     return {"status": "success", "message": "Degree updated successfully"}
@@ -0,0 +1,44 @@
+"""gesture jobs queue
+
+Revision ID: 3f6c2a9d1b47
+Revises: 116b661e7b93
+Create Date: 2026-10-18 12:10:41.205113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f6c2a9d1b47'
+down_revision: Union[str, None] = '116b661e7b93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('gesture_jobs',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('test_result_id', sa.UUID(), nullable=False),
+    sa.Column('test_number', sa.Integer(), nullable=False),
+    sa.Column('strict', sa.Boolean(), nullable=False),
+    sa.Column('group_size', sa.Integer(), nullable=False),
+    sa.Column('gesture_names', sa.ARRAY(sa.String()), nullable=False),
+    sa.Column('image_count', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('result', sa.Integer(), nullable=True),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['test_result_id'], ['test_results.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Воркеры выбирают задачи по статусу в порядке поступления
+    op.create_index('ix_gesture_jobs_status_created_at', 'gesture_jobs', ['status', 'created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_gesture_jobs_status_created_at', table_name='gesture_jobs')
+    op.drop_table('gesture_jobs')
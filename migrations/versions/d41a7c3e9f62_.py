@@ -0,0 +1,31 @@
+"""index test results by doctor and date
+
+Revision ID: d41a7c3e9f62
+Revises: b2e81d5c7a90
+Create Date: 2026-10-18 16:05:52.913384
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41a7c3e9f62'
+down_revision: Union[str, None] = 'b2e81d5c7a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY не блокирует запись в test_results, но не работает внутри транзакции
+    with op.get_context().autocommit_block():
+        op.create_index('ix_test_results_user_id_created_at', 'test_results', ['user_id', 'created_at', 'id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_test_results_user_id_created_at', table_name='test_results',
+                      postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,114 @@
+"""AnswerCatalog.score_many против прежнего поиска по списку и слияния множествами.
+
+Прежний путь /submit: ответы выбирались проходом по списку, а поля
+сливались в множества (process_selected_answers). Порядок значений в
+множестве не определён, поэтому значения полей сравниваются без учёта
+порядка, но без повторов.
+"""
+import json
+import random
+from typing import Any, Dict, List, Set
+
+import pytest
+from fastapi import HTTPException
+
+from app.utils.answers import ANSWERS_PATH, AnswerCatalog, POINT_FIELDS, TEXT_FIELDS
+
+
+def process_selected_answers(selected_answers: List[Dict[str, Any]]) -> Dict[str, Any]:
+    unique_fields: Dict[str, Set[str]] = {field: set() for field in TEXT_FIELDS}
+    total_points = {field: 0 for field in POINT_FIELDS}
+    for answer in selected_answers:
+        for field in unique_fields:
+            if answer.get(field):
+                unique_fields[field].add(answer[field])
+        for point_type in total_points:
+            total_points[point_type] += answer.get(point_type, 0)
+    return {**{field: list(values) for field, values in unique_fields.items()}, **total_points}
+
+
+def reference(answers, answer_ids):
+    selected = [answer for answer in answers if answer['answer_id'] in answer_ids]
+    return process_selected_answers(selected) if selected else None
+
+
+def normalized(result):
+    if result is None:
+        return None
+    for field in TEXT_FIELDS:
+        assert len(result[field]) == len(set(result[field])), field
+    return {**{field: sorted(result[field]) for field in TEXT_FIELDS},
+            **{field: result[field] for field in POINT_FIELDS}}
+
+
+def synthetic_answers(rng: random.Random, size: int = 150):
+    # Разреженные answer_id, общие текстовые значения у разных ответов и пустые поля во всех видах
+    pool = [f"value {i}" for i in range(12)]
+    answers = []
+    for answer_id in sorted(rng.sample(range(1, size * 3), size)):
+        answer = {"answer_id": answer_id}
+        for field in TEXT_FIELDS:
+            kind = rng.random()
+            if kind < 0.5:
+                answer[field] = rng.choice(pool)
+            elif kind < 0.65:
+                answer[field] = ""
+            elif kind < 0.8:
+                answer[field] = None
+        for field in POINT_FIELDS:
+            if rng.random() < 0.8:
+                answer[field] = rng.randint(0, 5)
+        answers.append(answer)
+    return answers
+
+
+def submissions(rng: random.Random, answers, count: int):
+    known = [answer['answer_id'] for answer in answers]
+    top = max(known)
+    result = [[], [-1, -5], [top + 1, top + 100], [0]]
+    for _ in range(count):
+        ids = rng.sample(known, rng.randint(1, min(40, len(known))))
+        ids += rng.choices(ids, k=rng.randint(0, 5))
+        ids += rng.sample(range(-3, top + 50), rng.randint(0, 5))
+        rng.shuffle(ids)
+        result.append(ids)
+    return result
+
+
+def catalogs():
+    rng = random.Random(0)
+    mock = json.loads(ANSWERS_PATH.read_text(encoding="utf-8"))["answers"]
+    return {"mockanswers": mock, "synthetic": synthetic_answers(rng)}
+
+
+@pytest.mark.parametrize("name", ["mockanswers", "synthetic"])
+def test_score_many_matches_set_merge(name):
+    answers = catalogs()[name]
+    catalog = AnswerCatalog(answers)
+    batch = submissions(random.Random(1), answers, 2000)
+
+    results = catalog.score_many(batch)
+
+    assert len(results) == len(batch)
+    for ids, result in zip(batch, results):
+        assert normalized(result) == normalized(reference(answers, ids)), ids
+
+
+def test_score_matches_score_many():
+    answers = catalogs()["synthetic"]
+    catalog = AnswerCatalog(answers)
+    for ids in submissions(random.Random(2), answers, 100)[4:]:
+        if reference(answers, ids) is not None:
+            assert catalog.score(ids) == catalog.score_many([ids])[0]
+
+
+@pytest.mark.parametrize("ids", [[], [-1], [10 ** 6]])
+def test_score_without_known_answers(ids):
+    catalog = AnswerCatalog(catalogs()["synthetic"])
+    with pytest.raises(HTTPException) as error:
+        catalog.score(ids)
+    assert error.value.status_code == 404
+
+
+def test_empty_catalog():
+    assert AnswerCatalog([]).score_many([[1, 2], []]) == [None, None]
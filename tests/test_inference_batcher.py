@@ -0,0 +1,78 @@
+"""MicroBatcher с поддельной моделью: порядок меток, размер батчей, ошибки."""
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.utils.inference_batcher import MicroBatcher
+
+MAX_BATCH = 8
+POISON = -1
+
+
+class FakeModel:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def __call__(self, images):
+        with self.lock:
+            self.batches.append(len(images))
+        if POISON in images:
+            raise RuntimeError("model failed")
+        time.sleep(self.delay)
+        return [f"label-{image}" for image in images]
+
+
+def labels(images):
+    return [f"label-{image}" for image in images]
+
+
+def test_concurrent_mixed_sizes_get_their_own_labels():
+    model = FakeModel(delay=0.002)
+    batcher = MicroBatcher(model, max_batch_size=MAX_BATCH, max_wait_ms=5)
+    rng = random.Random(0)
+    requests = [list(range(start * 100, start * 100 + rng.randint(1, MAX_BATCH * 3))) for start in range(200)]
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(lambda images: batcher.submit(images).result(timeout=30), requests))
+
+    assert results == [labels(images) for images in requests]
+    assert max(model.batches) <= MAX_BATCH
+    assert sum(model.batches) == sum(len(images) for images in requests)
+
+
+def test_request_that_does_not_fit_is_carried_to_next_batch():
+    model = FakeModel()
+    # Долгое ожидание: второй запрос гарантированно приходит, пока собирается первый батч
+    batcher = MicroBatcher(model, max_batch_size=MAX_BATCH, max_wait_ms=500)
+    first, second = batcher.submit([1, 2, 3, 4, 5]), batcher.submit([6, 7, 8, 9, 10])
+
+    assert first.result(timeout=5) == labels([1, 2, 3, 4, 5])
+    assert second.result(timeout=5) == labels([6, 7, 8, 9, 10])
+    assert model.batches == [5, 5]
+
+
+def test_oversized_request_is_split():
+    model = FakeModel()
+    batcher = MicroBatcher(model, max_batch_size=MAX_BATCH, max_wait_ms=1)
+    images = list(range(MAX_BATCH * 2 + 3))
+
+    assert batcher.submit(images).result(timeout=5) == labels(images)
+    assert max(model.batches) <= MAX_BATCH
+    assert sum(model.batches) == len(images)
+
+
+def test_failed_chunk_fails_combined_request():
+    model = FakeModel()
+    batcher = MicroBatcher(model, max_batch_size=MAX_BATCH, max_wait_ms=1)
+    images = list(range(MAX_BATCH * 3))
+    images[MAX_BATCH + 1] = POISON
+
+    with pytest.raises(RuntimeError, match="model failed"):
+        batcher.submit(images).result(timeout=5)
+    # Поток батчера переживает ошибку и обслуживает следующие запросы
+    assert batcher.submit([1, 2]).result(timeout=5) == labels([1, 2])
@@ -0,0 +1,22 @@
+"""verify_password: испорченные хэши в базе — неверный пароль, а не ошибка /login/."""
+import pytest
+
+from app.core.security.passwords import hash_password, verify_password
+
+
+def test_hash_round_trip():
+    stored = hash_password("secret")
+    assert verify_password("secret", stored) == (True, False)
+    assert verify_password("other", stored) == (False, False)
+
+
+@pytest.mark.parametrize("stored", [
+    "scrypt$",
+    "scrypt$16384$8",
+    "scrypt$n$8$1$AAAA$AAAA",
+    "scrypt$3$8$1$AAAA$AAAA",
+    "scrypt$16384$8$1$!!$AAAA",
+    "scrypt$16384$8$1$AAAA$AAAA$extra",
+])
+def test_malformed_hash_does_not_match(stored):
+    assert verify_password("secret", stored) == (False, False)
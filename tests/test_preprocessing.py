@@ -0,0 +1,74 @@
+"""decode_into + Normalizer против ViTImageProcessor на целых изображениях.
+
+Normalizer совпадает с процессором бит в бит на одном и том же уже
+уменьшенном изображении. Отличия даёт только draft-декодирование JPEG,
+которое уменьшает изображение в декодере до resize: для таких файлов
+проверяется допуск в уровнях яркости uint8 (в среднем около одного уровня,
+на отдельных пикселях до 11).
+"""
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+transformers = pytest.importorskip("transformers")
+
+from app.utils import ai_integration  # noqa: E402
+from app.utils.preprocessing import Normalizer  # noqa: E402
+
+# Один уровень uint8 после rescale и normalize с mean = std = 0.5
+LEVEL = 2 / 255
+DRAFT_MAX_LEVELS = 12
+DRAFT_MEAN_LEVELS = 1.5
+
+
+@pytest.fixture(scope="module")
+def processor(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("model")
+    transformers.ViTImageProcessor().save_pretrained(directory)
+
+    previous = ai_integration.model_path
+    ai_integration.model_path = str(directory)
+    ai_integration._preprocessor_config.cache_clear()
+    yield transformers.ViTImageProcessor.from_pretrained(directory)
+    ai_integration.model_path = previous
+    ai_integration._preprocessor_config.cache_clear()
+
+
+def encode(size, image_format: str, seed: int = 0) -> io.BytesIO:
+    # Гладкое изображение, похожее на фото: шум, увеличенный бикубически
+    rng = np.random.default_rng(seed)
+    noise = rng.integers(0, 256, (max(1, size[1] // 16), max(1, size[0] // 16), 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(noise).resize(size, Image.BICUBIC).save(buffer, format=image_format)
+    buffer.seek(0)
+    return buffer
+
+
+def difference(processor, file: io.BytesIO) -> np.ndarray:
+    width, height = ai_integration.input_size()
+    batch = np.empty((1, height, width, 3), dtype=np.uint8)
+    ai_integration.decode_into(file, batch[0])
+    actual = Normalizer.from_processor(processor)(batch).numpy()
+
+    file.seek(0)
+    with Image.open(file) as image:
+        expected = processor(images=image.convert("RGB"), return_tensors="np")["pixel_values"]
+    return np.abs(actual - expected)
+
+
+@pytest.mark.parametrize("size, image_format", [
+    ((1280, 960), "PNG"),
+    ((100, 80), "PNG"),
+    ((224, 224), "JPEG"),
+])
+def test_matches_processor_without_draft(processor, size, image_format):
+    assert difference(processor, encode(size, image_format)).max() == 0
+
+
+@pytest.mark.parametrize("size", [(1280, 960), (640, 480), (960, 1280)])
+def test_draft_jpeg_within_tolerance(processor, size):
+    levels = difference(processor, encode(size, "JPEG")) / LEVEL
+    assert levels.max() <= DRAFT_MAX_LEVELS + 1e-3
+    assert levels.mean() <= DRAFT_MEAN_LEVELS
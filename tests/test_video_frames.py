@@ -0,0 +1,81 @@
+"""Выборка кадров из видео: ошибки на файлах без видео и закрытие контейнера."""
+import io
+
+import numpy as np
+import pytest
+
+av = pytest.importorskip("av")
+
+from app.utils import video_frames  # noqa: E402
+
+SIZE = (32, 32)
+
+
+def make_video(frames: int = 30) -> io.BytesIO:
+    buffer = io.BytesIO()
+    with av.open(buffer, mode="w", format="mp4") as container:
+        stream = container.add_stream("mpeg4", rate=10)
+        stream.width, stream.height, stream.pix_fmt = 64, 48, "yuv420p"
+        for i in range(frames):
+            image = np.full((48, 64, 3), i * 8 % 256, dtype=np.uint8)
+            container.mux(stream.encode(av.VideoFrame.from_ndarray(image, format="rgb24")))
+        container.mux(stream.encode())
+    buffer.seek(0)
+    return buffer
+
+
+def make_audio() -> io.BytesIO:
+    buffer = io.BytesIO()
+    with av.open(buffer, mode="w", format="wav") as container:
+        stream = container.add_stream("pcm_s16le", rate=8000)
+        frame = av.AudioFrame.from_ndarray(np.zeros((1, 800), dtype=np.int16), format="s16", layout="mono")
+        frame.sample_rate = 8000
+        container.mux(stream.encode(frame))
+        container.mux(stream.encode())
+    buffer.seek(0)
+    return buffer
+
+
+@pytest.mark.parametrize("mode", video_frames.SAMPLING_MODES)
+def test_sample_frames(mode):
+    frames = video_frames.sample_frames(make_video(), 6, 3, SIZE, mode)
+    assert frames.shape == (6, SIZE[1], SIZE[0], 3)
+
+
+def test_no_video_stream():
+    with pytest.raises(ValueError, match="No video stream"):
+        video_frames.sample_frames(make_audio(), 6, 3, SIZE)
+
+
+class TrackedContainer:
+    def __init__(self, container):
+        self.container = container
+        self.closed = False
+
+    def __getattr__(self, name):
+        return getattr(self.container, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.closed = True
+        return self.container.__exit__(*exc_info)
+
+
+@pytest.mark.parametrize("mode", video_frames.SAMPLING_MODES)
+def test_container_closed_after_early_break(monkeypatch, mode):
+    video = make_video(60)
+    opened = []
+    real_open = av.open
+
+    def tracking_open(*args, **kwargs):
+        opened.append(TrackedContainer(real_open(*args, **kwargs)))
+        return opened[-1]
+
+    monkeypatch.setattr(video_frames.av, "open", tracking_open)
+    # Кадры нужны только из начала ролика, так что чтение прерывается задолго до конца
+    sample = video_frames.sample_motion if mode == "motion" else video_frames.sample_uniform
+    sample(video, [(0, 4), (4, 8)], [2, 2], SIZE)
+
+    assert len(opened) == 1 and opened[0].closed